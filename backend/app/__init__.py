@@ -1,12 +1,31 @@
 # app/__init__.py
 
 # This makes `app` a Python package
-# Optionally, you can import key submodules for easier access
-
-from .crew_orchestrator import CrewOrchestrator
-from .agents import (
-    ReaderAgent, ChunkingAgent, EmbeddingAgent, FAISSAgent,
-    SummarizerAgent, FlashcardAgent, QAAgent, AgentResult
-)
-from .agents.chunker import adaptive_chunker
+# Optionally, you can import key submodules for easier access. They are
+# imported on first access, so worker processes importing a light
+# submodule (app.agents.flashcard_worker) do not load the orchestrator.
+
+import importlib
+
 from .agents.config import *
+
+_EXPORTS = {
+    "CrewOrchestrator": ".crew_orchestrator",
+    "ReaderAgent": ".agents",
+    "ChunkingAgent": ".agents",
+    "EmbeddingAgent": ".agents",
+    "FAISSAgent": ".agents",
+    "SummarizerAgent": ".agents",
+    "FlashcardAgent": ".agents",
+    "QAAgent": ".agents",
+    "AgentResult": ".agents",
+    "adaptive_chunker": ".agents.chunker",
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,19 +1,37 @@
 # app/agents/__init__.py
 
-# Expose all agents and key utilities for easy import
+# Expose all agents and key utilities for easy import. They are imported on
+# first access, so loading a light submodule (flashcard_worker, in tagging
+# worker processes) does not load the models behind the agents.
 
-from .agents import (
-    ReaderAgent,
-    ChunkingAgent,
-    EmbeddingAgent,
-    FAISSAgent,
-    SummarizerAgent,
-    FlashcardAgent,
-    QAAgent,
-    AgentResult
-)
+import importlib
 
-from .pdf_utils import extract_with_ocr_if_needed
-from .flashcards import simple_flashcards_from_text, llm_flashcards_from_text
-from .summarizer import chunk_and_summarize_chunks
-from .faiss_index import FaissIndex
+_EXPORTS = {
+    "ReaderAgent": ".agents",
+    "ChunkingAgent": ".agents",
+    "EmbeddingAgent": ".agents",
+    "FAISSAgent": ".agents",
+    "SummarizerAgent": ".agents",
+    "FlashcardAgent": ".agents",
+    "QAAgent": ".agents",
+    "AgentResult": ".agents",
+    "extract_with_ocr_if_needed": ".pdf_utils",
+    "simple_flashcards_from_text": ".flashcards",
+    "llm_flashcards_from_text": ".flashcards",
+    "chunk_and_summarize_chunks": ".summarizer",
+    "FaissIndex": ".faiss_index",
+    "ChunkStore": ".chunk_store",
+    "ShardedFaissIndex": ".sharded_index",
+    "KeywordIndex": ".keyword_index",
+    "FlashcardStore": ".flashcard_store",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
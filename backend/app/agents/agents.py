@@ -2,10 +2,27 @@ from .pdf_utils import extract_with_ocr_if_needed
 from .chunker import adaptive_chunker
 from .embeddings import EmbeddingService
 from .faiss_index import FaissIndex
-from .summarizer import chunk_and_summarize_chunks
-from .flashcards import llm_flashcards_from_text, simple_flashcards_from_text
-from .config import EMBEDDING_BACKEND, GEMMA_API_KEY
+from .keyword_index import KeywordIndex, reciprocal_rank_fusion
+from .answer_cache import AnswerCache, SemanticQueryCache, answer_key, answer_scope
+from .summarizer import (
+    chunk_and_summarize_chunks, extractive_filter, extractive_filter_many, reduce_summaries_many,
+    summarize_parallel, abstractive_summarize_batch, stream_summary
+)
+from .flashcards import llm_flashcards_from_text, simple_flashcards_from_text, flashcards_from_chunks
+from .config import (
+    EMBEDDING_BACKEND, GEMMA_API_KEY, ROUTING_TOP_DOCS, QA_RETRIEVAL_MODE,
+    ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES,
+    QA_ANSWER_MODE, QA_FUSE_SUMMARIES, QA_EXTRACTIVE_SENTENCES, MAX_FLASHCARDS_PER_DOC,
+    QA_DEFAULT_BUDGET_MS, QA_STAGE_ESTIMATES_MS
+)
+from .deadline import Deadline, StageEstimates
 from typing import Any, List, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import numpy as np
+from nltk.tokenize import sent_tokenize
 
 class AgentResult:
     """
@@ -72,24 +89,115 @@ class FAISSAgent:
     name = "FAISSAgent"
     def __init__(self, dim):
         self.idx = FaissIndex(dim)
+        self.keywords = KeywordIndex()
+        self.version = 0  # bumped on every add/upsert/remove; keys cached answers
+
+    def attach_keyword_index(self, keywords):
+        """
+        Use a persisted keyword index, rebuilding it from the chunk store when
+        it is missing or out of step with FAISS (e.g. first run after upgrade).
+        """
+        self.keywords = keywords
+        if len(keywords) != len(self.idx):
+            keywords.clear()
+            ids, metas = [], []
+            for vid, meta in self.idx.chunks():
+                ids.append(vid)
+                metas.append(meta)
+            keywords.add(ids, metas)
+            print(f"Rebuilt keyword index over {len(ids)} chunks")
 
     def add(self, vectors, metas):
-        self.idx.add(vectors, metas)
-        res = AgentResult(self.name, payload={"status": "added", "num_vectors": len(metas)})
+        ids = self.idx.add(vectors, metas)
+        self.keywords.add(ids, metas)
+        self.version += 1
+        res = AgentResult(self.name, payload={"status": "added", "num_vectors": len(metas), "ids": ids})
         res.add_log(f"added {len(metas)} vectors to FAISS")
         return res
 
-    def search(self, qvec, top_k=5):
-        hits = self.idx.search(qvec, top_k=top_k)
+    def upsert(self, pdf_id, vectors, metas):
+        ids = self.idx.upsert(pdf_id, vectors, metas)
+        self.keywords.remove_pdf(pdf_id)
+        self.keywords.add(ids, metas)
+        self.version += 1
+        res = AgentResult(self.name, payload={"status": "upserted", "num_vectors": len(metas), "ids": ids})
+        res.add_log(f"replaced vectors of {pdf_id} with {len(metas)} new vectors")
+        return res
+
+    def remove(self, pdf_id):
+        removed = self.idx.remove(pdf_id)
+        self.keywords.remove_pdf(pdf_id)
+        self.version += 1
+        res = AgentResult(self.name, payload={"status": "removed", "num_vectors": removed})
+        res.add_log(f"removed {removed} vectors of {pdf_id} from FAISS")
+        return res
+
+    def search(self, qvec, top_k=5, pdf_id=None, route_docs=ROUTING_TOP_DOCS):
+        """
+        Coarse-to-fine search: unless the caller scoped the query, pick the
+        route_docs documents whose centroids best match the query and only
+        search chunk vectors within them.
+        """
+        routed = None
+        if pdf_id is None and route_docs and self.idx.num_documents() > route_docs:
+            routed = [doc for doc, _ in self.idx.route_documents(qvec, route_docs)]
+            pdf_id = routed
+        hits = self.idx.search(qvec, top_k=top_k, pdf_id=pdf_id)
         res = AgentResult(self.name, payload={"hits": hits})
+        if routed is not None:
+            res.add_log(f"routed query to documents {routed}")
         res.add_log(f"found {len(hits)} hits")
         return res
 
+    def search_many(self, qvecs, top_k=5, pdf_id=None, route_docs=ROUTING_TOP_DOCS):
+        """
+        Batched search: one FAISS call for all query vectors and one
+        metadata fetch for all hits. With routing, queries routed to the
+        same documents share a call.
+
+        Returns:
+            AgentResult with "hits": one hit list per query, in order
+        """
+        qvecs = np.asarray(qvecs, dtype='float32')
+        groups = {}
+        if pdf_id is None and route_docs and self.idx.num_documents() > route_docs:
+            for i, qvec in enumerate(qvecs):
+                routed = tuple(sorted(doc for doc, _ in self.idx.route_documents(qvec, route_docs)))
+                groups.setdefault(routed, []).append(i)
+        else:
+            groups[pdf_id if pdf_id is None or isinstance(pdf_id, str) else tuple(pdf_id)] = list(range(len(qvecs)))
+        rows = [None] * len(qvecs)
+        for scope, members in groups.items():
+            _, I = self.idx.search_raw(qvecs[members], top_k=top_k, pdf_id=scope)
+            for i, row in zip(members, I):
+                rows[i] = [int(vid) for vid in row if vid >= 0]
+        by_id = {hit["id"]: hit for hit in self.idx.hits_for(sorted({vid for row in rows for vid in row}))}
+        hits = [[dict(by_id[vid]) for vid in row if vid in by_id] for row in rows]
+        res = AgentResult(self.name, payload={"hits": hits})
+        res.add_log(f"searched {len(qvecs)} queries in {len(groups)} FAISS calls")
+        return res
+
+    def annotate(self, ids, fields):
+        """Merge extra metadata (e.g. per-chunk summaries) into stored chunks."""
+        updated = self.idx.annotate(ids, fields)
+        self.version += 1
+        res = AgentResult(self.name, payload={"status": "annotated", "num_vectors": updated})
+        res.add_log(f"stored metadata {sorted({k for f in fields for k in f})} for {updated} chunks")
+        return res
+
+    def keyword_search(self, query, top_k=5, pdf_id=None):
+        """BM25 search over chunk texts; needs no query embedding."""
+        ranked = self.keywords.search(query, top_k=top_k, pdf_id=pdf_id)
+        hits = self.idx.hits_for([vid for vid, _ in ranked])
+        res = AgentResult(self.name, payload={"hits": hits})
+        res.add_log(f"keyword search found {len(hits)} hits")
+        return res
+
 class SummarizerAgent:
     name = "SummarizerAgent"
-    def run(self, chunks):
+    def run(self, chunks, stop=None):
         try:
-            pack = chunk_and_summarize_chunks(chunks)
+            pack = chunk_and_summarize_chunks(chunks, stop=stop)
             res = AgentResult(self.name, payload={"summary_pack": pack})
             res.add_log("performed hierarchical summarization")
             return res
@@ -110,77 +218,351 @@ class FlashcardAgent:
         res.add_log(f"generated {len(cards)} flashcards")
         return res
 
+    def run_chunks(self, texts, max_cards=MAX_FLASHCARDS_PER_DOC):
+        """Flashcards ranked across every chunk of a document."""
+        cards = flashcards_from_chunks(texts, max_cards=max_cards)
+        res = AgentResult(self.name, payload={"flashcards": cards})
+        res.add_log(f"generated {len(cards)} flashcards from {len(texts)} chunks")
+        return res
+
 class QAAgent:
     name = "QAAgent"
     def __init__(self, embedding_service, faiss_agent, summarizer_agent):
         self.embedding_service = embedding_service
         self.faiss_agent = faiss_agent
         self.summarizer_agent = summarizer_agent
+        self.stage_ms = StageEstimates(QA_STAGE_ESTIMATES_MS)
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qa-answer")
+        self.cache = AnswerCache(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS) if ANSWER_CACHE_ENABLED else None
+        self.semantic_cache = None
+        if SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticQueryCache(
+                faiss_agent.idx.dim,
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                ttl_seconds=ANSWER_CACHE_TTL_SECONDS
+            )
+
+    def retrieve(self, query, top_k=5, pdf_id=None, mode=QA_RETRIEVAL_MODE, qvec=None):
+        """
+        Retrieve chunks for a query.
+
+        Args:
+            query: Query text
+            top_k: Number of chunks
+            pdf_id: Optional document id (or ids) to search within
+            mode: "semantic" (FAISS), "keyword" (BM25), "hybrid" (both, fused
+                by reciprocal rank) or "auto" (keyword for short term lookups
+                that the keyword index can answer, hybrid otherwise)
+            qvec: Query embedding, if the caller already computed it
+
+        Returns:
+            (hits, mode actually used)
+        """
+        if mode not in ("auto", "semantic", "keyword", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        if mode in ("auto", "keyword"):
+            if mode == "keyword" or self.faiss_agent.keywords.is_keyword_query(query):
+                hits = self.faiss_agent.keyword_search(query, top_k=top_k, pdf_id=pdf_id).payload["hits"]
+                if hits or mode == "keyword":
+                    return hits, "keyword"
+            mode = "hybrid"
+
+        if qvec is None:
+            qvec = self.embedding_service.embed([query])[0]
+            print(f"Generated query vector with shape: {qvec.shape}")
+        hits = self.faiss_agent.search(qvec, top_k=top_k, pdf_id=pdf_id).payload["hits"]
+        if mode == "semantic":
+            return hits, mode
+
+        lexical = self.faiss_agent.keyword_search(query, top_k=top_k, pdf_id=pdf_id).payload["hits"]
+        by_id = {h["id"]: h for h in hits + lexical}
+        fused = reciprocal_rank_fusion([[h["id"] for h in hits], [h["id"] for h in lexical]], top_k=top_k)
+        return [by_id[vid] for vid in fused], mode
 
-    def run(self, query, top_k=5):
+    def _answer_from_summaries(self, hits, fuse=False, stop=None):
+        """
+        Answer assembled from the per-chunk summaries stored at ingest, so no
+        generation runs at query time. Hits whose summary is not stored yet
+        (background job still running) use a short extractive filter. With
+        fuse=True the parts are tree-reduced into one abstractive answer.
+        """
+        return self._answers_from_summaries([hits], fuse=fuse, stop=stop)[0]
+
+    def _answers_from_summaries(self, hit_lists, fuse=False, stop=None):
+        """
+        _answer_from_summaries for several queries; fusion runs batched and
+        ends early (joining the stored summaries) once `stop` is set.
+        """
+        parts_lists = []
+        for hits in hit_lists:
+            parts = []
+            for h in hits:
+                part = h.get("summary") or extractive_filter(h["text"], top_k=2)
+                if part and part not in parts:
+                    parts.append(part)
+            parts_lists.append(parts)
+        fused = [""] * len(parts_lists)
+        if fuse:
+            try:
+                fused = reduce_summaries_many(parts_lists, stop=stop)
+            except Exception as e:
+                print(f"Summary fusion failed, joining stored summaries: {e}")
+        return [f or " ".join(parts) for f, parts in zip(fused, parts_lists)]
+
+    def _extractive_answer(self, qvec, hits, num_sentences=QA_EXTRACTIVE_SENTENCES):
+        """
+        Answer made of the hit sentences closest to the query. Sentences are
+        embedded in one batch (reusing cached sentence vectors) and ranked by
+        cosine similarity to the query vector.
+
+        Returns:
+            (answer text, list of {text, score, id, pdf_id, page} in rank order)
+        """
+        return self._extractive_answers([qvec], [hits], num_sentences)[0]
+
+    def _extractive_answers(self, qvecs, hit_lists, num_sentences=QA_EXTRACTIVE_SENTENCES):
+        """_extractive_answer for several queries, embedding all their sentences in one batch."""
+        per_query = []
+        for hits in hit_lists:
+            sentences, owners, seen = [], [], set()
+            for h in hits:
+                for sent in sent_tokenize(h["text"]):
+                    if len(sent.split()) >= 3 and sent not in seen:
+                        seen.add(sent)
+                        sentences.append(sent)
+                        owners.append(h)
+            per_query.append((sentences, owners))
+        vectors = self.embedding_service.embed_cached([sent for sentences, _ in per_query for sent in sentences])
+        results, offset = [], 0
+        for qvec, (sentences, owners) in zip(qvecs, per_query):
+            if not sentences:
+                results.append(("", []))
+                continue
+            scores = vectors[offset:offset + len(sentences)] @ np.asarray(qvec, dtype='float32')
+            offset += len(sentences)
+            top = np.argsort(-scores)[:num_sentences]
+            ranked = [
+                {
+                    "text": sentences[i],
+                    "score": float(scores[i]),
+                    "id": owners[i].get("id"),
+                    "pdf_id": owners[i].get("pdf_id"),
+                    "page": owners[i].get("page"),
+                }
+                for i in top
+            ]
+            results.append((" ".join(r["text"] for r in ranked), ranked))
+        return results
+
+    def _abstractive_answers(self, hit_lists):
+        """
+        Query-time summaries for several queries, batched through the same
+        stages SummarizerAgent applies to one combined text: extractive
+        filter, per-chunk summary, then the final summary.
+        """
+        combined = ["\n".join(h["text"] for h in hits) for hits in hit_lists]
+        fallback = [text[:500] + "..." if len(text) > 500 else text for text in combined]
         try:
-            print(f"QAAgent processing query: {query}")
-            qvecs = self.embedding_service.embed([query])
-            print(f"Generated query vector with shape: {qvecs.shape}")
-            
-            # Check if FAISS index has any data
-            if len(self.faiss_agent.idx.metadb) == 0:
-                print("FAISS index is empty - no documents have been indexed")
-                return AgentResult(
-                    self.name,
-                    payload={"answer": "No documents have been indexed yet. Please upload and process a PDF first.", "sources": []}
-                )
-            
-            hits_res = self.faiss_agent.search(qvecs[0], top_k=top_k)
-            hits = hits_res.payload["hits"]
-            print(f"FAISS search returned {len(hits)} hits")
-
-            if not hits:
-                # No results found, return a default answer
-                print("No search results found")
-                return AgentResult(
-                    self.name,
-                    payload={"answer": "No relevant information found in the indexed documents. Please ensure the PDF has been processed and indexed.", "sources": []}
-                )
+            filtered = extractive_filter_many(combined, top_k=6)
+            briefs = summarize_parallel(filtered, max_length=120)
+            briefs = [brief or text for brief, text in zip(briefs, combined)]
+            finals = abstractive_summarize_batch(briefs, max_length=300, min_length=100)
+            return [final or short for final, short in zip(finals, fallback)]
+        except Exception as e:
+            print(f"Batched summarization failed, using simple truncation: {e}")
+            return fallback
 
-            combined_text = "\n".join(h["text"] for h in hits)
-            print(f"Combined text length: {len(combined_text)}")
-            
-            # Try to summarize the combined text
+    def _abstractive_answer(self, hits, stop=None):
+        """
+        Summarize the combined hit texts at query time, through the stages of
+        _abstractive_answers; generation ends once `stop` is set. Raises if
+        the model did not produce the summary, so the caller degrades to a
+        cheaper tier instead of reporting truncated text as abstractive.
+        """
+        combined_text = "\n".join(h["text"] for h in hits)
+        failed = []
+        brief = abstractive_summarize_batch([extractive_filter(combined_text, top_k=6)], max_length=120,
+                                            fallbacks=failed, stop=stop)[0]
+        final = abstractive_summarize_batch([brief], max_length=300, min_length=100,
+                                            fallbacks=failed, stop=stop)[0]
+        if failed or not final:
+            raise RuntimeError("summarizer fell back to extractive text")
+        return final
+
+    # Answer tiers from most to least expensive; a request degrades down this list
+    TIERS = ("abstractive", "fused_summaries", "extractive", "summaries", "truncation")
+
+    def _tier_ladder(self, requested):
+        """The requested tier followed by every tier currently estimated to be cheaper."""
+        cost = {t: self.stage_ms[t] for t in self.TIERS}
+        cheaper = sorted((t for t in self.TIERS if t != requested and cost[t] < cost[requested]),
+                         key=lambda t: cost[t], reverse=True)
+        ladder = [requested] + cheaper
+        if "truncation" not in ladder:
+            ladder.append("truncation")
+        return ladder
+
+    def _timed(self, stage, fn, *args):
+        start = time.perf_counter()
+        out = fn(*args)
+        self.stage_ms.observe(stage, (time.perf_counter() - start) * 1000)
+        return out
+
+    def _answer_within(self, query, qvec, hits, requested, deadline):
+        """
+        Produce an answer on the first tier of the ladder that fits the
+        remaining budget. Generation tiers run under a timeout equal to
+        the remaining budget; on expiry their generation is stopped (so the
+        worker is released) and the next tier is tried.
+
+        Returns:
+            (answer, evidence or None, tier used, query vector)
+        """
+        for tier in self._tier_ladder(requested):
+            estimate = self.stage_ms[tier]
+            if tier == "extractive" and qvec is None:
+                estimate += self.stage_ms["embed"]
+            if tier != "truncation" and not deadline.allows(estimate):
+                print(f"Skipping {tier} answer: ~{estimate:.0f} ms estimated, {deadline.remaining_ms():.0f} ms left")
+                continue
             try:
-                # For now, use a simple approach to avoid the list index error
-                # TODO: Fix the summarization pipeline properly
-                if len(combined_text) > 500:
-                    final_summary = combined_text[:500] + "..."
-                else:
-                    final_summary = combined_text
-                
-                print("Using simple text truncation instead of summarization")
-                
-                # Try the actual summarization as a fallback
-                try:
-                    summary_res = self.summarizer_agent.run([{"text": combined_text}])
-                    summary_pack = summary_res.payload.get("summary_pack", {})
-                    if summary_pack.get("final_summary"):
-                        final_summary = summary_pack.get("final_summary")
-                        print("Summarization succeeded")
-                except Exception as e:
-                    print(f"Summarization failed, using simple truncation: {str(e)}")
-                    
+                if tier in ("abstractive", "fused_summaries"):
+                    fn = self._abstractive_answer if tier == "abstractive" else (
+                        lambda h, stop: self._answer_from_summaries(h, fuse=True, stop=stop))
+                    if deadline.unlimited:
+                        return self._timed(tier, fn, hits, None), None, tier, qvec
+                    stop = threading.Event()
+                    future = self._pool.submit(self._timed, tier, fn, hits, stop)
+                    try:
+                        return future.result(timeout=deadline.remaining_s()), None, tier, qvec
+                    except FutureTimeout:
+                        stop.set()
+                        print(f"{tier} answer missed the deadline, degrading")
+                        continue
+                if tier == "extractive":
+                    if qvec is None:
+                        qvec = self._timed("embed", self.embedding_service.embed, [query])[0]
+                    answer, evidence = self._timed(tier, self._extractive_answer, qvec, hits)
+                    return answer, evidence, tier, qvec
+                if tier == "summaries":
+                    return self._timed(tier, self._answer_from_summaries, hits), None, tier, qvec
             except Exception as e:
-                # If anything fails, use the first part of the combined text
-                final_summary = combined_text[:500] + "..."
-                print(f"All summarization failed, using raw text: {str(e)}")
-                print(f"Summarization error details: {e}")
-                import traceback
-                traceback.print_exc()
-
-            res = AgentResult(
-                self.name,
-                payload={"answer": final_summary, "sources": hits}
-            )
-            res.add_log("answered query by retrieving and summarizing top chunks")
-            return res
+                print(f"{tier} answer failed, degrading: {e}")
+                continue
+            combined_text = "\n".join(h["text"] for h in hits)
+            answer = combined_text[:500] + "..." if len(combined_text) > 500 else combined_text
+            return answer, None, "truncation", qvec
+
+    def _prepare(self, query, top_k, pdf_id, mode, answer_mode, fuse, deadline):
+        """
+        Cache lookups and retrieval shared by run and stream.
+
+        Returns:
+            Dict with "payload" (and "log") when the request is already
+            answered (cache hit, empty index, no hits); otherwise the
+            retrieval state: hits, mode, qvec, key, scope, version, degraded.
+        """
+        key = None
+        scope = answer_scope(top_k, pdf_id, mode, answer_mode, fuse)
+        # Index version the answer is retrieved under; the caches file it
+        # under this one even if the index changes before it is finished
+        version = self.faiss_agent.version
+        if self.cache is not None:
+            key = answer_key(query, scope, version)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {"payload": cached, "log": "served answer from cache"}
+
+        print(f"QAAgent processing query: {query}")
+
+        # Check if FAISS index has any data
+        if len(self.faiss_agent.idx) == 0:
+            print("FAISS index is empty - no documents have been indexed")
+            return {"payload": {"answer": "No documents have been indexed yet. Please upload and process a PDF first.", "sources": []}}
+
+        # Semantic cache: a paraphrase of a recent query under the same index
+        # version reuses its answer. Term lookups skip it so they never embed.
+        qvec = None
+        degraded = False
+        lexical = mode == "keyword" or (mode == "auto" and self.faiss_agent.keywords.is_keyword_query(query))
+        if not lexical and not deadline.allows(self.stage_ms["embed"] + self.stage_ms["retrieve"]):
+            # No time to embed and search the graph: answer from the keyword index if it can
+            if self.faiss_agent.keywords.search(query, top_k=1, pdf_id=pdf_id):
+                print("Budget too small for semantic retrieval, using keyword retrieval")
+                mode, lexical, degraded = "keyword", True, True
+        if self.semantic_cache is not None and not lexical:
+            qvec = self._timed("embed", self.embedding_service.embed, [query])[0]
+            cached = self.semantic_cache.get(qvec, scope, version)
+            if cached is not None:
+                if key is not None:
+                    self.cache.put(key, cached)
+                return {"payload": cached, "log": "served answer of a similar cached query"}
+
+        hits, mode = self._timed("retrieve", self.retrieve, query, top_k, pdf_id, mode, qvec)
+        print(f"{mode} retrieval returned {len(hits)} hits")
+
+        if not hits:
+            # No results found, return a default answer
+            print("No search results found")
+            return {"payload": {"answer": "No relevant information found in the indexed documents. Please ensure the PDF has been processed and indexed.", "sources": []}}
+
+        return {"hits": hits, "mode": mode, "qvec": qvec, "key": key, "scope": scope, "version": version,
+                "degraded": degraded}
+
+    def _finish(self, ctx, answer, evidence, tier, requested, answer_mode, budget_ms):
+        """Build the answer result from the retrieval state and cache it unless degraded."""
+        mode, qvec = ctx["mode"], ctx["qvec"]
+        degraded = ctx["degraded"] or tier != requested
+        res = AgentResult(
+            self.name,
+            payload={
+                "answer": answer, "sources": ctx["hits"], "retrieval_mode": mode,
+                "answer_mode": answer_mode, "tier": tier, "degraded": degraded
+            }
+        )
+        if evidence is not None:
+            res.payload["sentences"] = evidence
+        res.add_log(f"answered query by {mode} retrieval and {tier} answer"
+                    + (f" (degraded to fit {budget_ms} ms)" if degraded else ""))
+        # Degraded answers are not cached: a later request with more time should do better
+        if not degraded:
+            if ctx["key"] is not None:
+                self.cache.put(ctx["key"], res.payload)
+            if qvec is not None and self.semantic_cache is not None:
+                self.semantic_cache.put(qvec, ctx["scope"], ctx["version"], res.payload)
+        return res
+
+    def run(self, query, top_k=5, pdf_id=None, mode=QA_RETRIEVAL_MODE, answer_mode=QA_ANSWER_MODE,
+            fuse=QA_FUSE_SUMMARIES, budget_ms=QA_DEFAULT_BUDGET_MS):
+        """
+        Answer a query.
+
+        Args:
+            query: Question text
+            top_k: Number of chunks to retrieve
+            pdf_id: Optional document id (or ids) to search within
+            mode: Retrieval mode (see retrieve)
+            answer_mode: "summaries", "extractive" or "abstractive"
+            fuse: Fuse stored summaries into one generated answer
+            budget_ms: Latency budget; stages that would overrun it are
+                skipped for cheaper ones (keyword retrieval instead of
+                embedding, then abstractive -> extractive -> stored
+                summaries -> truncation). The payload's `tier` reports
+                the answer step used.
+        """
+        deadline = Deadline(budget_ms)
+        try:
+            ctx = self._prepare(query, top_k, pdf_id, mode, answer_mode, fuse, deadline)
+            if "payload" in ctx:
+                res = AgentResult(self.name, payload=ctx["payload"])
+                if ctx.get("log"):
+                    res.add_log(ctx["log"])
+                return res
+
+            requested = "fused_summaries" if answer_mode == "summaries" and fuse else answer_mode
+            answer, evidence, tier, ctx["qvec"] = self._answer_within(query, ctx["qvec"], ctx["hits"], requested, deadline)
+            return self._finish(ctx, answer, evidence, tier, requested, answer_mode, budget_ms)
             
         except Exception as e:
             # If anything fails, return a basic response
@@ -191,3 +573,197 @@ class QAAgent:
                 self.name,
                 payload={"answer": f"Error processing query: {str(e)}", "sources": []}
             )
+
+    def stream(self, query, top_k=5, pdf_id=None, mode=QA_RETRIEVAL_MODE, answer_mode=QA_ANSWER_MODE,
+               fuse=QA_FUSE_SUMMARIES, budget_ms=QA_DEFAULT_BUDGET_MS):
+        """
+        Answer a query as a sequence of events, same arguments as run:
+
+            ("sources", {"sources", "retrieval_mode"})  as soon as retrieval is done
+            ("token", {"text"})                         answer pieces, in order
+            ("done", payload without sources)           the complete answer
+
+        Abstractive answers stream token by token while the summarizer
+        generates (greedy decoding; generation stops early if budget_ms
+        runs out). Other tiers are cheap and arrive as a single piece.
+        """
+        deadline = Deadline(budget_ms)
+        try:
+            ctx = self._prepare(query, top_k, pdf_id, mode, answer_mode, fuse, deadline)
+        except Exception as e:
+            print(f"QAAgent error: {e}")
+            ctx = {"payload": {"answer": f"Error processing query: {str(e)}", "sources": []}}
+        if "payload" in ctx:
+            payload = ctx["payload"]
+            yield "sources", {"sources": payload["sources"], "retrieval_mode": payload.get("retrieval_mode")}
+            if payload["answer"]:
+                yield "token", {"text": payload["answer"]}
+            yield "done", {k: v for k, v in payload.items() if k != "sources"}
+            return
+
+        hits = ctx["hits"]
+        yield "sources", {"sources": hits, "retrieval_mode": ctx["mode"]}
+
+        requested = "fused_summaries" if answer_mode == "summaries" and fuse else answer_mode
+        answer = None
+        evidence = None
+        if requested == "abstractive" and deadline.allows(self.stage_ms["abstractive"]):
+            pieces, stop = [], threading.Event()
+            # stream_summary sets `stop` whenever it ends; this records a deadline cut only
+            cut_short = False
+            start = time.perf_counter()
+            try:
+                text = extractive_filter("\n".join(h["text"] for h in hits), top_k=6)
+                summary_stream = stream_summary(text, stop=stop)
+                try:
+                    for piece in summary_stream:
+                        pieces.append(piece)
+                        yield "token", {"text": piece}
+                        if not deadline.unlimited and deadline.remaining_ms() <= 0:
+                            cut_short = True
+                            stop.set()
+                finally:
+                    # Also runs when the client disconnects (GeneratorExit): stops generation
+                    summary_stream.close()
+                if cut_short:
+                    ctx["degraded"] = True
+                else:
+                    self.stage_ms.observe("abstractive", (time.perf_counter() - start) * 1000)
+                if pieces:
+                    answer, tier = "".join(pieces).strip(), "abstractive"
+            except Exception as e:
+                print(f"Streaming summarization failed, degrading: {e}")
+                if pieces:
+                    answer, tier = "".join(pieces).strip(), "abstractive"
+                    ctx["degraded"] = True
+        if answer is None:
+            ladder = self._tier_ladder(requested)
+            start_tier = ladder[1] if requested == "abstractive" else requested
+            try:
+                answer, evidence, tier, ctx["qvec"] = self._answer_within(query, ctx["qvec"], hits, start_tier, deadline)
+            except Exception as e:
+                print(f"QAAgent error: {e}")
+                combined_text = "\n".join(h["text"] for h in hits)
+                answer, tier = combined_text[:500], "truncation"
+            if answer:
+                yield "token", {"text": answer}
+
+        res = self._finish(ctx, answer, evidence, tier, requested, answer_mode, budget_ms)
+        yield "done", {k: v for k, v in res.payload.items() if k != "sources"}
+
+    def run_many(self, queries, top_k=5, pdf_id=None, mode=QA_RETRIEVAL_MODE, answer_mode=QA_ANSWER_MODE,
+                 fuse=QA_FUSE_SUMMARIES):
+        """
+        Answer many queries with shared settings (same arguments as run,
+        without a latency budget). Cache lookups are per query; the misses
+        are embedded in one encode call, searched in one FAISS call and
+        answered in batched form.
+
+        Returns:
+            One AgentResult per query, in input order
+        """
+        results = [None] * len(queries)
+        try:
+            scope = answer_scope(top_k, pdf_id, mode, answer_mode, fuse)
+            version = self.faiss_agent.version
+            ctxs = {}
+            for i, query in enumerate(queries):
+                key = answer_key(query, scope, version) if self.cache is not None else None
+                cached = self.cache.get(key) if key is not None else None
+                if cached is not None:
+                    results[i] = AgentResult(self.name, payload=cached)
+                    results[i].add_log("served answer from cache")
+                else:
+                    ctxs[i] = {"key": key, "scope": scope, "version": version, "qvec": None, "degraded": False,
+                               "mode": mode}
+            if not ctxs:
+                return results
+            print(f"QAAgent processing {len(ctxs)} queries in batch")
+
+            if len(self.faiss_agent.idx) == 0:
+                print("FAISS index is empty - no documents have been indexed")
+                for i in ctxs:
+                    results[i] = AgentResult(
+                        self.name,
+                        payload={"answer": "No documents have been indexed yet. Please upload and process a PDF first.", "sources": []}
+                    )
+                return results
+
+            # Term lookups go to the keyword index first, as in retrieve
+            hits_by = {}
+            for i in ctxs:
+                if mode == "keyword" or (mode == "auto" and self.faiss_agent.keywords.is_keyword_query(queries[i])):
+                    hits = self.faiss_agent.keyword_search(queries[i], top_k=top_k, pdf_id=pdf_id).payload["hits"]
+                    if hits or mode == "keyword":
+                        hits_by[i] = hits
+                        ctxs[i]["mode"] = "keyword"
+
+            # One encode call for every query that needs a vector
+            need_vec = [i for i in ctxs if i not in hits_by or answer_mode == "extractive"]
+            if need_vec:
+                vectors = self.embedding_service.embed([queries[i] for i in need_vec])
+                for i, qvec in zip(need_vec, vectors):
+                    ctxs[i]["qvec"] = qvec
+
+            dense = [i for i in ctxs if i not in hits_by]
+            if self.semantic_cache is not None:
+                for i in list(dense):
+                    cached = self.semantic_cache.get(ctxs[i]["qvec"], scope, version)
+                    if cached is not None:
+                        if ctxs[i]["key"] is not None:
+                            self.cache.put(ctxs[i]["key"], cached)
+                        results[i] = AgentResult(self.name, payload=cached)
+                        results[i].add_log("served answer of a similar cached query")
+                        del ctxs[i]
+                        dense.remove(i)
+
+            # One FAISS call for the semantic and hybrid queries
+            if dense:
+                qvecs = np.vstack([ctxs[i]["qvec"] for i in dense])
+                hit_lists = self.faiss_agent.search_many(qvecs, top_k=top_k, pdf_id=pdf_id).payload["hits"]
+                for i, hits in zip(dense, hit_lists):
+                    if mode != "semantic":
+                        lexical = self.faiss_agent.keyword_search(queries[i], top_k=top_k, pdf_id=pdf_id).payload["hits"]
+                        by_id = {h["id"]: h for h in hits + lexical}
+                        fused = reciprocal_rank_fusion([[h["id"] for h in hits], [h["id"] for h in lexical]], top_k=top_k)
+                        hits = [by_id[vid] for vid in fused]
+                    hits_by[i] = hits
+                    ctxs[i]["mode"] = "semantic" if mode == "semantic" else "hybrid"
+
+            for i in list(ctxs):
+                if not hits_by[i]:
+                    results[i] = AgentResult(
+                        self.name,
+                        payload={"answer": "No relevant information found in the indexed documents. Please ensure the PDF has been processed and indexed.", "sources": []}
+                    )
+                    del ctxs[i]
+                else:
+                    ctxs[i]["hits"] = hits_by[i]
+
+            # Batched answer stage
+            order = list(ctxs)
+            hit_lists = [ctxs[i]["hits"] for i in order]
+            requested = "fused_summaries" if answer_mode == "summaries" and fuse else answer_mode
+            evidence = [None] * len(order)
+            if requested == "abstractive":
+                answers = self._abstractive_answers(hit_lists)
+            elif requested == "extractive":
+                answers, evidence = [], []
+                for answer, ranked in self._extractive_answers([ctxs[i]["qvec"] for i in order], hit_lists):
+                    answers.append(answer)
+                    evidence.append(ranked)
+            else:
+                answers = self._answers_from_summaries(hit_lists, fuse=requested == "fused_summaries")
+            for i, answer, ranked in zip(order, answers, evidence):
+                results[i] = self._finish(ctxs[i], answer, ranked, requested, requested, answer_mode, None)
+            return results
+
+        except Exception as e:
+            print(f"Batched QA failed, answering queries one by one: {e}")
+            import traceback
+            traceback.print_exc()
+            return [
+                res if res is not None else self.run(query, top_k=top_k, pdf_id=pdf_id, mode=mode,
+                                                     answer_mode=answer_mode, fuse=fuse)
+                for query, res in zip(queries, results)
+            ]
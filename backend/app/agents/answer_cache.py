@@ -0,0 +1,207 @@
+import threading
+import time
+import faiss
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple, Union
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query."""
+    return " ".join(query.lower().split())
+
+
+def answer_scope(top_k: int, pdf_id: Optional[Union[str, Iterable[str]]], *settings: Hashable) -> Tuple[Hashable, ...]:
+    """
+    Request settings besides the query text that an answer depends on:
+    top_k, the document filter and any mode switches.
+    """
+    if pdf_id is not None and not isinstance(pdf_id, str):
+        pdf_id = tuple(sorted(pdf_id, key=str))
+    return (top_k, pdf_id) + settings
+
+
+def answer_key(query: str, scope: Tuple[Hashable, ...], index_version: int) -> Tuple[Hashable, ...]:
+    """Cache key for a QA request against one version of the index."""
+    return (normalize_query(query),) + scope + (index_version,)
+
+
+class AnswerCache:
+    """
+    In-memory LRU cache of QA payloads with a time-to-live. Entries are
+    keyed by answer_key, so any index change (new version) makes earlier
+    answers unreachable; they age out through LRU/TTL.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 600):
+        """
+        Args:
+            max_entries: Capacity before least recently used entries are evicted
+            ttl_seconds: Lifetime of an entry (None = no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Cached payload (shallow copy) or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry[1]
+        return dict(payload, sources=list(payload.get("sources", [])))
+
+    def put(self, key: Hashable, payload: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+class SemanticQueryCache:
+    """
+    Cache of answers by query meaning: a small flat inner-product FAISS index
+    over the (normalized) embeddings of recently answered queries. A query
+    whose similarity to a cached one reaches `threshold`, with the same
+    top_k, filters, mode and index version, gets that query's answer.
+    Entries from older index versions are dropped as soon as the version
+    moves on; beyond `max_entries` the least recently used are evicted.
+    """
+
+    def __init__(self, dim: int, threshold: float = 0.92, max_entries: int = 512,
+                 ttl_seconds: Optional[float] = 600, probe: int = 8):
+        """
+        Args:
+            dim: Query embedding dimension
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Capacity before LRU eviction
+            ttl_seconds: Lifetime of an entry (None = no expiry)
+            probe: Nearest cached queries checked per lookup
+        """
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.probe = probe
+        self.hits = 0
+        self.misses = 0
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        # id -> (created, scope key, payload), in LRU order
+        self._entries: "OrderedDict[int, Tuple[float, Hashable, Dict[str, Any]]]" = OrderedDict()
+        self._next_id = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sync_version(self, version: int) -> bool:
+        """
+        Move the cache forward to a newer index version, dropping every
+        entry. False for a version older than the current one (a request
+        that began before the index changed), which never resets the cache.
+        """
+        if self._version is not None and version < self._version:
+            return False
+        if version != self._version:
+            self._index.reset()
+            self._entries.clear()
+            self._version = version
+        return True
+
+    def _evict(self, ids):
+        if ids:
+            self._index.remove_ids(np.asarray(ids, dtype='int64'))
+            for vid in ids:
+                self._entries.pop(vid, None)
+
+    def get(self, qvec, scope: Hashable, version: int) -> Optional[Dict[str, Any]]:
+        """
+        Answer of the most similar cached query with the same scope
+        (top_k, filters, modes) under this index version, or None.
+        """
+        q = np.asarray(qvec, dtype='float32').reshape(1, self.dim)
+        with self._lock:
+            if not self._sync_version(version) or not self._entries:
+                self.misses += 1
+                return None
+            D, I = self._index.search(q, min(self.probe, len(self._entries)))
+            now = time.monotonic()
+            expired = []
+            found = None
+            for sim, vid in zip(D[0], I[0]):
+                if vid < 0 or sim < self.threshold:
+                    break
+                created, entry_scope, payload = self._entries[int(vid)]
+                if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+                    expired.append(int(vid))
+                    continue
+                if entry_scope == scope:
+                    self._entries.move_to_end(int(vid))
+                    found = payload
+                    break
+            self._evict(expired)
+            if found is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return dict(found, sources=list(found.get("sources", [])))
+
+    def put(self, qvec, scope: Hashable, version: int, payload: Dict[str, Any]):
+        """
+        Cache an answer retrieved under `version`. Answers from any version
+        but the current one are dropped: only get moves the version on.
+        """
+        q = np.asarray(qvec, dtype='float32').reshape(1, self.dim)
+        with self._lock:
+            if version != self._version:
+                return
+            vid = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(q, np.asarray([vid], dtype='int64'))
+            self._entries[vid] = (time.monotonic(), scope, payload)
+            if len(self._entries) > self.max_entries:
+                self._evict(list(self._entries)[:len(self._entries) - self.max_entries])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+            }
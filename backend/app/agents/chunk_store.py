@@ -0,0 +1,395 @@
+import json
+import sqlite3
+import threading
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Sequence, Tuple
+
+# Columns stored natively; any other metadata keys go into the `extra` JSON blob
+_CORE_KEYS = ("text", "page", "pdf_id")
+# Centroid table key for chunks without a pdf_id (NULL cannot be a usable primary key)
+_NULL_DOC = "\x00"
+
+
+class ChunkStore:
+    """
+    SQLite-backed chunk metadata store keyed by vector id.
+    Rows are written incrementally on add and fetched lazily for search hits,
+    so nothing proportional to the corpus is held in memory.
+    """
+
+    def __init__(self, path: Optional[Path] = None, id_base: int = 0):
+        """
+        Args:
+            path: SQLite file to use. None keeps the store in memory.
+            id_base: First vector id handed out by an empty store
+        """
+        self.id_base = id_base
+        self.path: Optional[Path] = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._tombstone_changes = 0  # bumped when this store changes which ids are tombstoned
+        self._live: Optional[int] = None  # cached live row count, kept current by this store's writes
+        self._live_version: Optional[int] = None  # data_version the count was taken at
+        self._conn = sqlite3.connect(
+            str(self.path) if self.path is not None else ":memory:",
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                pdf_id TEXT,
+                page INTEGER,
+                text TEXT NOT NULL,
+                extra TEXT,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+        if "deleted" not in columns:
+            # Stores created before tombstones existed
+            self._conn.execute("ALTER TABLE chunks ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_pdf_id ON chunks(pdf_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_deleted ON chunks(deleted)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        # Running vector sum and count per document, for centroid routing
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS doc_centroids (
+                doc_key TEXT PRIMARY KEY,
+                vec_sum BLOB NOT NULL,
+                count INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_meta(row) -> Dict[str, Any]:
+        vid, pdf_id, page, text, extra = row
+        meta: Dict[str, Any] = {"text": text, "page": page, "pdf_id": pdf_id}
+        if extra:
+            meta.update(json.loads(extra))
+        return meta
+
+    def append(
+        self,
+        ids: Sequence[int],
+        metadata_list: List[Dict[str, Any]],
+        vectors: Optional[np.ndarray] = None
+    ):
+        """
+        Insert metadata rows for the given vector ids in a single transaction.
+
+        Args:
+            ids: Vector ids aligned with metadata_list
+            metadata_list: List of metadata dicts
+            vectors: Optional embeddings aligned with ids, folded into the
+                per-document centroid sums in the same transaction
+        """
+        rows = []
+        for vid, meta in zip(ids, metadata_list):
+            extra = {k: v for k, v in meta.items() if k not in _CORE_KEYS}
+            rows.append((
+                int(vid),
+                meta.get("pdf_id"),
+                meta.get("page"),
+                meta.get("text", ""),
+                json.dumps(extra, ensure_ascii=False) if extra else None
+            ))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, pdf_id, page, text, extra, deleted) VALUES (?, ?, ?, ?, ?, 0)",
+                rows
+            )
+            next_id = max(self.next_id(), max(r[0] for r in rows) + 1)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('next_id', ?)",
+                (str(next_id),)
+            )
+            if vectors is not None:
+                self._add_to_centroids([r[1] for r in rows], np.asarray(vectors))
+            self._conn.commit()
+            # INSERT OR REPLACE revives any tombstoned row at these ids
+            self._tombstone_changes += 1
+            self._live = None  # replaced rows make the delta unknown; recount once
+
+    def _add_to_centroids(self, pdf_ids: List[Optional[str]], vectors: np.ndarray):
+        """Fold vectors into their documents' running sums (caller commits)."""
+        groups: Dict[Optional[str], List[int]] = {}
+        for pos, pdf_id in enumerate(pdf_ids):
+            groups.setdefault(pdf_id, []).append(pos)
+        for pdf_id, positions in groups.items():
+            key = _NULL_DOC if pdf_id is None else pdf_id
+            vec_sum = vectors[positions].astype('float64').sum(axis=0)
+            count = len(positions)
+            row = self._conn.execute(
+                "SELECT vec_sum, count FROM doc_centroids WHERE doc_key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                vec_sum = vec_sum + np.frombuffer(row[0], dtype='float64')
+                count += row[1]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO doc_centroids (doc_key, vec_sum, count) VALUES (?, ?, ?)",
+                (key, vec_sum.tobytes(), count)
+            )
+
+    def rebuild_centroids(self, ids: Sequence[int], vectors: np.ndarray):
+        """Recompute every document centroid from the given live vectors."""
+        metas = self.get_many(ids)
+        keep = [i for i, m in enumerate(metas) if m is not None]
+        with self._lock:
+            self._conn.execute("DELETE FROM doc_centroids")
+            if keep:
+                self._add_to_centroids([metas[i]["pdf_id"] for i in keep], np.asarray(vectors)[keep])
+            self._conn.commit()
+
+    def centroids(self) -> Tuple[List[Optional[str]], np.ndarray, np.ndarray]:
+        """
+        Per-document vector sums.
+
+        Returns:
+            (pdf_ids, sums of shape (num_docs, dim), counts)
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT doc_key, vec_sum, count FROM doc_centroids").fetchall()
+        if not rows:
+            return [], np.zeros((0, 0)), np.zeros(0)
+        pdf_ids = [None if key == _NULL_DOC else key for key, _, _ in rows]
+        sums = np.vstack([np.frombuffer(blob, dtype='float64') for _, blob, _ in rows])
+        counts = np.asarray([count for _, _, count in rows], dtype='float64')
+        return pdf_ids, sums, counts
+
+    def num_documents(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM doc_centroids").fetchone()[0]
+
+    def get_many(self, ids: Sequence[int]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Fetch metadata for the given vector ids.
+
+        Returns:
+            List aligned with ids; missing ids map to None
+        """
+        ids = [int(i) for i in ids]
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, pdf_id, page, text, extra FROM chunks WHERE id IN ({placeholders})",
+                ids
+            ).fetchall()
+        by_id = {row[0]: self._row_to_meta(row) for row in rows}
+        return [by_id.get(i) for i in ids]
+
+    def live_ids(self, ids: Sequence[int]) -> List[int]:
+        """Subset of ids that have a live (non-tombstoned) row."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM chunks WHERE deleted = 0 AND id IN ({placeholders})",
+                ids
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def ids_for_pdf(self, pdf_id: Optional[str]) -> List[int]:
+        """Live (non-tombstoned) vector ids belonging to a document."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM chunks WHERE pdf_id IS ? AND deleted = 0 ORDER BY id",
+                (pdf_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def ids_for_pdfs(self, pdf_ids: Sequence[Optional[str]]) -> List[int]:
+        """Live vector ids belonging to any of the given documents (None matches chunks without one)."""
+        named = [p for p in pdf_ids if p is not None]
+        clauses = []
+        if named:
+            clauses.append(f"pdf_id IN ({','.join('?' * len(named))})")
+        if len(named) < len(list(pdf_ids)):
+            clauses.append("pdf_id IS NULL")
+        if not clauses:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM chunks WHERE ({' OR '.join(clauses)}) AND deleted = 0 ORDER BY id",
+                named
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def tombstone_pdf(self, pdf_id: Optional[str]) -> int:
+        """
+        Tombstone every live chunk of a document and drop its centroid.
+
+        Returns:
+            Number of rows newly tombstoned
+        """
+        with self._lock:
+            removed = self.tombstone(self.ids_for_pdf(pdf_id))
+            self._conn.execute(
+                "DELETE FROM doc_centroids WHERE doc_key = ?",
+                (_NULL_DOC if pdf_id is None else pdf_id,)
+            )
+            self._conn.commit()
+        return removed
+
+    def annotate(self, ids: Sequence[int], fields: List[Dict[str, Any]]) -> int:
+        """
+        Merge extra metadata fields (e.g. a chunk summary) into existing
+        rows. Core columns cannot be changed this way.
+
+        Returns:
+            Number of rows updated
+        """
+        ids = [int(i) for i in ids]
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            current = dict(self._conn.execute(
+                f"SELECT id, extra FROM chunks WHERE id IN ({placeholders})", ids
+            ).fetchall())
+            updates = []
+            for vid, new in zip(ids, fields):
+                if vid not in current:
+                    continue
+                extra = json.loads(current[vid]) if current[vid] else {}
+                extra.update({k: v for k, v in new.items() if k not in _CORE_KEYS})
+                updates.append((json.dumps(extra, ensure_ascii=False), vid))
+            self._conn.executemany("UPDATE chunks SET extra = ? WHERE id = ?", updates)
+            self._conn.commit()
+        return len(updates)
+
+    def tombstone(self, ids: Sequence[int]) -> int:
+        """
+        Mark vector ids as deleted. Their rows stay until the next compaction.
+
+        Returns:
+            Number of rows newly tombstoned
+        """
+        ids = [int(i) for i in ids]
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE chunks SET deleted = 1 WHERE deleted = 0 AND id IN ({placeholders})",
+                ids
+            )
+            self._conn.commit()
+            if cur.rowcount:
+                self._tombstone_changes += 1
+                if self._live is not None:
+                    self._live -= cur.rowcount
+        return cur.rowcount
+
+    def deleted_ids(self) -> List[int]:
+        """Ids tombstoned but not yet purged by compaction."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM chunks WHERE deleted = 1 ORDER BY id").fetchall()
+        return [row[0] for row in rows]
+
+    def tombstone_version(self) -> Tuple[int, int]:
+        """
+        Token that changes whenever the set of tombstoned ids may have
+        changed: a counter of this store's own writes plus SQLite's
+        data_version, which moves when another connection (e.g. a writer
+        process) commits. Lets callers cache deleted_ids.
+        """
+        with self._lock:
+            return self._tombstone_changes, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def num_deleted(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks WHERE deleted = 1").fetchone()[0]
+
+    def purge(self, ids: Sequence[int]):
+        """Drop tombstoned rows once their vectors are gone from the index."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE id = ? AND deleted = 1",
+                [(i,) for i in ids]
+            )
+            self._conn.commit()
+            self._tombstone_changes += 1
+
+    def next_id(self) -> int:
+        """
+        Next unused vector id. Ids are never reused, even after their rows
+        are purged by compaction.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'next_id'").fetchone()
+            if row is not None:
+                return int(row[0])
+            row = self._conn.execute("SELECT MAX(id) FROM chunks").fetchone()
+        return row[0] + 1 if row[0] is not None else self.id_base
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Read a JSON value from the store's key/value table."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def set_meta(self, key: str, value: Any):
+        """Persist a JSON-serializable value under key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        """Number of live (non-tombstoned) chunks."""
+        with self._lock:
+            # data_version moves when another connection commits; then the cached count is stale
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._live is None or version != self._live_version:
+                self._live = self._conn.execute("SELECT COUNT(*) FROM chunks WHERE deleted = 0").fetchone()[0]
+                self._live_version = version
+            return self._live
+
+    def __getitem__(self, vid: int) -> Dict[str, Any]:
+        meta = self.get_many([vid])[0]
+        if meta is None:
+            raise KeyError(vid)
+        return meta
+
+    def items(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(vector id, metadata) for every live chunk, in id order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, pdf_id, page, text, extra FROM chunks WHERE deleted = 0 ORDER BY id"
+            ).fetchall()
+        for row in rows:
+            yield row[0], self._row_to_meta(row)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, pdf_id, page, text, extra FROM chunks WHERE deleted = 0 ORDER BY id"
+            ).fetchall()
+        for row in rows:
+            yield self._row_to_meta(row)
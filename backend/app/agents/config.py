@@ -4,6 +4,9 @@ from pathlib import Path
 # GENERAL SETTINGS
 # ===============================
 USE_CREW_SDK = False  # set True if integrating with Crew AI orchestration
+INGEST_BACKGROUND_JOBS = True  # ingest returns once indexed; summaries/flashcards run as background jobs
+JOB_WORKERS = 1                # background job threads (each summarization is already batched/parallel)
+JOB_HISTORY_MAX = 500          # finished jobs kept for status queries
 
 # ===============================
 # DATA PATHS
@@ -11,7 +14,33 @@ USE_CREW_SDK = False  # set True if integrating with Crew AI orchestration
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "../data"
 FAISS_INDEX_PATH = BASE_DIR / "../data/faiss_index.bin"
-METADATA_DB = BASE_DIR / "../data/faiss_metadata.json"
+METADATA_DB = BASE_DIR / "../data/faiss_metadata.json"  # legacy JSON metadata, migrated on load
+CHUNK_STORE_PATH = BASE_DIR / "../data/faiss_chunks.db"  # SQLite chunk store keyed by vector id
+FAISS_WAL_PATH = BASE_DIR / "../data/faiss_index.wal"   # vectors added since the last snapshot
+FAISS_VECTORS_PATH = BASE_DIR / "../data/faiss_vectors.npy"  # raw embeddings, row = vector id
+VECTOR_STORE_DTYPE = "float32"  # "float16" halves the raw vector store at a small precision cost
+KEYWORD_INDEX_PATH = BASE_DIR / "../data/keyword_index.db"  # BM25 inverted index keyed by vector id
+
+# ===============================
+# HNSW SETTINGS
+# ===============================
+# Defaults for a fresh index; `scripts/tune_index.py` persists tuned values with the index
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 50
+TUNE_TARGET_RECALL = 0.95     # recall@k the tuned configuration must reach
+TUNE_MEMORY_BUDGET_MB = None  # optional cap on index size
+TUNE_NUM_QUERIES = 200        # chunk vectors held out as sample queries
+
+# ===============================
+# INDEX MAINTENANCE SETTINGS
+# ===============================
+COMPACTION_TOMBSTONE_RATIO = 0.2  # rebuild the HNSW graph once this share of vectors is deleted
+FILTER_EXACT_SEARCH_MAX = 4096    # document-filtered searches over fewer vectors skip the graph
+WAL_SNAPSHOT_EVERY = 5000         # snapshot the index once the write-ahead log holds this many vectors
+FAISS_MMAP_LOAD = False           # memory-map the index read-only (multi-worker serving; disables ingest)
+FAISS_NUM_SHARDS = 1              # >1 partitions the corpus across a ShardedFaissIndex
+FAISS_SHARD_PARTITION = "hash"    # "hash" (by pdf_id) or "size" (new PDFs go to the smallest shard)
 
 # ===============================
 # CHUNKING SETTINGS
@@ -32,14 +61,58 @@ GEMMA_API_KEY = None  # not used when local embeddings
 # ===============================
 # Model name for Hugging Face summarization
 SUMMARIZER_MODEL = "t5-small"  # Lightweight model, properly configured
+SUMMARIZER_BATCH_SIZE = 8      # chunks per generation call (length-sorted, padded)
+SUMMARIZER_MAX_INPUT_TOKENS = None  # None uses the tokenizer's model_max_length
+SUMMARIZER_WORKERS = 2         # threads summarizing batches / reduce groups in parallel
+SUMMARIZER_FAST_MODE = False   # int8 dynamic quantization + greedy decoding on CPU (see scripts/benchmark_summarizer.py)
+SUMMARIZER_FAST_NUM_BEAMS = 1  # 1 = greedy; 2 is a small beam
+SUMMARIZER_FAST_OUTPUT_RATIO = 0.5  # fast mode generates at most this share of the input's tokens
+SUMMARY_CACHE_ENABLED = True   # reuse summaries of unchanged text across ingest and queries
+SUMMARY_CACHE_PATH = BASE_DIR / "../data/summary_cache.db"  # keyed by text hash, model and lengths
+SUMMARY_CACHE_MAX_ENTRIES = 50000  # least recently used summaries are evicted beyond this
 
 # ===============================
 # FLASHCARD SETTINGS
 # ===============================
 MAX_FLASHCARDS_PER_DOC = 15
 MAX_SIMPLE_FLASHCARDS = 10
+FLASHCARD_WORKERS = 4         # spawned processes tagging chunks of large documents
+FLASHCARD_PARALLEL_MIN_CHUNKS = 16  # smaller documents are tagged in-process
+FLASHCARD_DEDUP_THRESHOLD = 0.8  # question word Jaccard similarity at which cards count as duplicates
+FLASHCARD_MAX_PER_ANSWER = 2  # cards blanking out the same term
+FLASHCARD_STORE_PATH = BASE_DIR / "../data/flashcards.db"  # cards per pdf_id, written at ingest
+FLASHCARD_PAGE_SIZE = 50      # default /flashcards page size
+FLASHCARD_PAGE_MAX = 500      # largest page /flashcards returns
 
 # ===============================
 # QA SETTINGS
 # ===============================
 TOP_K_RETRIEVAL = 5  # number of chunks to retrieve for QA
+ROUTING_TOP_DOCS = 3  # unscoped queries only search chunks of the best-matching documents (0 disables)
+QA_RETRIEVAL_MODE = "auto"  # "semantic", "keyword" (BM25 only), "hybrid" (fused) or "auto"
+KEYWORD_QUERY_MAX_TERMS = 4  # "auto" answers short term lookups from the keyword index alone
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60  # reciprocal rank fusion constant for hybrid retrieval
+QA_ANSWER_MODE = "summaries"  # "summaries" (stored per-chunk summaries), "extractive" (query-similar sentences)
+                              # or "abstractive" (summarize hits per query)
+QA_EXTRACTIVE_SENTENCES = 5   # sentences in an extractive answer
+QA_FUSE_SUMMARIES = False     # tree-reduce the hits' stored summaries into one generated answer
+QA_DEFAULT_BUDGET_MS = None   # per-request latency budget; None = no deadline
+QA_BATCH_MAX_QUERIES = 256    # largest /query/batch request accepted
+# Starting estimates (ms) per QA stage; refined from observed timings at runtime
+QA_STAGE_ESTIMATES_MS = {
+    "embed": 30,
+    "retrieve": 60,
+    "abstractive": 3000,
+    "fused_summaries": 3000,
+    "extractive": 150,
+    "summaries": 5,
+    "truncation": 0,
+}
+ANSWER_CACHE_ENABLED = True       # reuse answers to repeated queries until the index changes
+ANSWER_CACHE_MAX_ENTRIES = 1024
+ANSWER_CACHE_TTL_SECONDS = 600    # None keeps answers until evicted or the index changes
+SEMANTIC_CACHE_ENABLED = True     # also reuse answers of paraphrased queries
+SEMANTIC_CACHE_THRESHOLD = 0.92   # cosine similarity between query embeddings to count as the same question
+SEMANTIC_CACHE_MAX_ENTRIES = 512
@@ -0,0 +1,57 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class Deadline:
+    """
+    Latency budget of one request. A None budget never expires, so code
+    can check it unconditionally.
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self._expires = time.monotonic() + budget_ms / 1000 if budget_ms is not None else None
+
+    @property
+    def unlimited(self) -> bool:
+        return self._expires is None
+
+    def remaining_ms(self) -> float:
+        if self._expires is None:
+            return float("inf")
+        return max(0.0, (self._expires - time.monotonic()) * 1000)
+
+    def remaining_s(self) -> Optional[float]:
+        """Remaining time in seconds for timeouts (None when unlimited)."""
+        return None if self._expires is None else self.remaining_ms() / 1000
+
+    def allows(self, estimate_ms: float) -> bool:
+        """True if a step expected to take estimate_ms fits in what is left."""
+        return estimate_ms <= self.remaining_ms()
+
+
+class StageEstimates:
+    """
+    Running (exponentially weighted) estimates of how long each answer
+    stage takes, seeded from configured defaults and updated from observed
+    timings, so degradation decisions track the machine's actual load.
+    """
+
+    def __init__(self, defaults: Dict[str, float], alpha: float = 0.2):
+        self._ms = dict(defaults)
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def __getitem__(self, stage: str) -> float:
+        with self._lock:
+            return self._ms.get(stage, 0.0)
+
+    def observe(self, stage: str, elapsed_ms: float):
+        with self._lock:
+            prev = self._ms.get(stage)
+            self._ms[stage] = elapsed_ms if prev is None else (1 - self.alpha) * prev + self.alpha * elapsed_ms
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._ms)
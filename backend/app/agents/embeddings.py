@@ -1,3 +1,5 @@
+import threading
+from collections import OrderedDict
 from typing import List
 import numpy as np
 from sentence_transformers import SentenceTransformer
@@ -12,15 +14,19 @@ class EmbeddingService:
     No API keys needed; runs fully locally.
     """
 
-    def __init__(self, model_name: str = LOCAL_EMBEDDING_MODEL):
+    def __init__(self, model_name: str = LOCAL_EMBEDDING_MODEL, cache_size: int = 20000):
         """
         Initialize the embedding model.
         
         Args:
             model_name: Name of the local SentenceTransformer model
+            cache_size: Texts kept by embed_cached (LRU)
         """
         self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def embed(self, texts: List[str]) -> np.ndarray:
         """
@@ -36,3 +42,24 @@ class EmbeddingService:
             return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
         embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
         return embeddings.astype(np.float32)
+
+    def embed_cached(self, texts: List[str]) -> np.ndarray:
+        """
+        Like embed, but vectors of recently embedded texts are reused and
+        only the rest are encoded, in one batch.
+        """
+        with self._cache_lock:
+            known = {t: self._cache[t] for t in set(texts) if t in self._cache}
+            for t in known:
+                self._cache.move_to_end(t)
+        missing = list(dict.fromkeys(t for t in texts if t not in known))
+        if missing:
+            fresh = self.embed(missing)
+            known.update(zip(missing, fresh))
+            with self._cache_lock:
+                self._cache.update(zip(missing, fresh))
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if not texts:
+            return self.embed([])
+        return np.vstack([known[t] for t in texts]).astype(np.float32)
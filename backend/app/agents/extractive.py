@@ -0,0 +1,73 @@
+"""
+Shared extractive scoring engine for summarizer.py and safe_summarizer.py.
+"""
+
+import numpy as np
+from scipy import sparse
+from typing import Dict, List
+
+
+def _term_matrix(token_lists: List[List[str]], vocab: Dict[str, int]) -> sparse.csr_matrix:
+    """Sparse (rows x vocab) count matrix; tokens outside vocab are dropped."""
+    indptr = [0]
+    indices: List[int] = []
+    for tokens in token_lists:
+        indices.extend(vocab[t] for t in tokens if t in vocab)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float64)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(token_lists), len(vocab)))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def top_sentences(
+    sentence_lists: List[List[str]],
+    texts: List[str],
+    top_k: int,
+    length_divisor: float
+) -> List[List[str]]:
+    """
+    Top-k sentences of many chunks, scored in one vectorized pass.
+
+    A sentence scores the sum, over its whitespace words, of how often that
+    word (lowercased, longer than 3 characters) occurs in its chunk's text,
+    plus its length in characters divided by length_divisor. The chunk-term and
+    sentence-term counts are sparse matrices over one shared vocabulary, so
+    every sentence of the document is scored by a single row-wise product.
+
+    Args:
+        sentence_lists: Sentences of each chunk
+        texts: Full text of each chunk (source of its word frequencies)
+        top_k: Sentences to keep per chunk
+        length_divisor: Characters of sentence length worth one point
+
+    Returns:
+        Selected sentences per chunk, best first (ties: later string first)
+    """
+    chunk_tokens = [[w for w in text.lower().split() if len(w) > 3] for text in texts]
+    vocab: Dict[str, int] = {}
+    for tokens in chunk_tokens:
+        for w in tokens:
+            vocab.setdefault(w, len(vocab))
+
+    sentences = [s for sents in sentence_lists for s in sents]
+    if not sentences:
+        return [[] for _ in sentence_lists]
+    owner = np.repeat(np.arange(len(sentence_lists)), [len(sents) for sents in sentence_lists])
+
+    freq = _term_matrix(chunk_tokens, vocab)
+    counts = _term_matrix([[w.lower() for w in s.split()] for s in sentences], vocab)
+    scores = np.asarray(counts.multiply(freq[owner]).sum(axis=1)).ravel()
+    scores += np.fromiter((len(s) for s in sentences), dtype=np.float64, count=len(sentences)) / length_divisor
+
+    # Rank by (chunk, score desc, sentence desc) to match sorting (score, sentence) tuples in reverse
+    _, text_rank = np.unique(np.asarray(sentences, dtype=object), return_inverse=True)
+    order = np.lexsort((-text_rank, -scores, owner))
+    starts = np.searchsorted(owner[order], np.arange(len(sentence_lists)))
+    rank_in_chunk = np.arange(len(order)) - starts[owner[order]]
+    keep = order[rank_in_chunk < top_k]
+
+    selected: List[List[str]] = [[] for _ in sentence_lists]
+    for i in keep:
+        selected[owner[i]].append(sentences[i])
+    return selected
@@ -1,91 +1,624 @@
 import faiss
 import numpy as np
 import json
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from .config import FAISS_INDEX_PATH, METADATA_DB
+from typing import List, Dict, Any, Optional, Union, Iterable
+from .config import (
+    FAISS_INDEX_PATH, METADATA_DB, CHUNK_STORE_PATH, FAISS_WAL_PATH,
+    FAISS_VECTORS_PATH, VECTOR_STORE_DTYPE,
+    COMPACTION_TOMBSTONE_RATIO, FILTER_EXACT_SEARCH_MAX, WAL_SNAPSHOT_EVERY,
+    HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH
+)
+from .chunk_store import ChunkStore
+from .wal import WriteAheadLog
+from .vector_store import VectorStore
+
+
+def merge_topk(results, top_k: int):
+    """
+    Merge several (D, I) search results over the same queries into a single
+    top_k by ascending L2 distance. Missing results (id -1) sort last.
+
+    Args:
+        results: List of (D, I) arrays, each of shape (num_queries, k_i)
+        top_k: Number of hits to keep per query
+
+    Returns:
+        Merged (D, I) arrays of shape (num_queries, top_k)
+    """
+    D = np.hstack([d for d, _ in results])
+    I = np.hstack([i for _, i in results])
+    D = np.where(I < 0, np.inf, D)
+    order = np.argsort(D, axis=1, kind="stable")[:, :top_k]
+    return np.take_along_axis(D, order, axis=1), np.take_along_axis(I, order, axis=1)
+
+
+class _ReadWriteLock:
+    """
+    Any number of readers or a single writer. A waiting writer holds back
+    new readers, so a steady stream of searches cannot starve ingest.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
 
 
 class FaissIndex:
     """
-    FAISS wrapper using HNSWFlat for vector search with parallel metadata store.
+    FAISS wrapper using an ID-mapped HNSWFlat for vector search with a SQLite
+    chunk store keyed by stable 64-bit vector ids. Metadata is only read back
+    for the hits of a search.
+
+    HNSW cannot remove vectors, so deletes are tombstones in the chunk store
+    that search skips via an ID selector; a background compaction rebuilds
+    the graph once tombstones cross COMPACTION_TOMBSTONE_RATIO.
+
+    Searches can be scoped to one or more pdf_ids. Small scopes are searched
+    exactly over just that document's vectors; larger ones restrict the HNSW
+    traversal with an ID selector.
+
+    An index opened with `load` is bound to its files: every add is fsynced
+    to a write-ahead log before it is applied, and `save` installs a full
+    snapshot with an atomic rename and then empties the log. Metadata and
+    tombstones are durable in the SQLite chunk store on their own.
+
+    With `load(..., mmap=True)` the snapshot's vector storage is memory-mapped
+    read-only instead of copied into the heap, so several worker processes
+    share the same physical pages. Such an index rejects writes; vectors still
+    in the log are replayed into a small in-memory delta index searched
+    alongside the snapshot.
+
+    Every embedding is also appended to a raw vector store (`.npy`, row =
+    vector id), the store of record from which `rebuild_from_vectors` and
+    compaction rebuild any index type without re-running the embedding model.
+
+    The chunk store also keeps a running centroid per pdf_id, updated in the
+    same transaction as each add, so `route_documents` can pick the few
+    documents worth searching before any chunk vector is touched.
     """
 
-    def __init__(self, dim: int):
+    def __init__(self, dim: int, store_path: Optional[Path] = None, id_base: int = 0):
         """
         Args:
             dim: Dimension of embedding vectors.
+            store_path: SQLite chunk store path. None keeps metadata in memory.
+            id_base: First vector id assigned by an empty index
         """
         self.dim: int = dim
-        self.index = faiss.IndexHNSWFlat(dim, 32)
-        self.index.hnsw.efConstruction = 200
-        self.index.hnsw.efSearch = 50
-        self.metadb: List[Dict[str, Any]] = []
+        self.metadb: ChunkStore = ChunkStore(store_path, id_base=id_base)
+        # Tuned parameters persist in the chunk store next to the index
+        self.hnsw_params: Dict[str, int] = self.metadb.get_meta("hnsw_params") or {
+            "M": HNSW_M,
+            "efConstruction": HNSW_EF_CONSTRUCTION,
+            "efSearch": HNSW_EF_SEARCH,
+        }
+        # Optional faiss index_factory string replacing the default HNSWFlat
+        self.index_factory: Optional[str] = self.metadb.get_meta("index_factory")
+        self.index = self._new_index()
+        self._lock = threading.RLock()
+        # FAISS searches share the index; only adding to it (which mutates
+        # the graph and id map in place) excludes them
+        self._search_lock = _ReadWriteLock()
+        self._compaction: Optional[threading.Thread] = None
+        self.index_path: Optional[Path] = None
+        self.wal: Optional[WriteAheadLog] = None
+        self.vectors: Optional[VectorStore] = None
+        self.read_only: bool = False
+        self._delta: Optional[faiss.IndexIDMap2] = None  # WAL tail of a read-only index
+        self._delta_ids: set = set()
+        self._router = None  # cached (pdf_ids, normalized centroid matrix)
+        self._tombstones = None  # cached (tombstone version, batch, not-selector) excluding deleted ids
+
+    def _new_index(self) -> faiss.IndexIDMap2:
+        if self.index_factory:
+            return faiss.IndexIDMap2(faiss.index_factory(self.dim, self.index_factory))
+        hnsw = faiss.IndexHNSWFlat(self.dim, self.hnsw_params["M"])
+        hnsw.hnsw.efConstruction = self.hnsw_params["efConstruction"]
+        hnsw.hnsw.efSearch = self.hnsw_params["efSearch"]
+        return faiss.IndexIDMap2(hnsw)
 
-    def add(self, vectors: np.ndarray, metadata_list: List[Dict[str, Any]]):
+    def set_hnsw_params(self, params: Dict[str, int]):
+        """
+        Persist new HNSW parameters with the index and apply them. efSearch
+        takes effect immediately; a changed M or efConstruction rebuilds the
+        graph (which also compacts tombstones).
         """
-        Add vectors and metadata to the index.
+        self._check_writable()
+        if self.index_factory:
+            raise ValueError(f"Index built from factory '{self.index_factory}' is not HNSWFlat")
+        params = {**self.hnsw_params, **params}
+        rebuild = (params["M"], params["efConstruction"]) != (self.hnsw_params["M"], self.hnsw_params["efConstruction"])
+        with self._lock:
+            self.hnsw_params = params
+            self.metadb.set_meta("hnsw_params", params)
+            self.hnsw.efSearch = params["efSearch"]
+        if rebuild:
+            self.compact()
+
+    @property
+    def hnsw(self) -> Optional[faiss.HNSW]:
+        """HNSW graph of the wrapped index (for reading/tuning efSearch etc.), if it is one."""
+        inner = faiss.downcast_index(self.index.index)
+        return inner.hnsw if isinstance(inner, faiss.IndexHNSW) else None
+
+    def __len__(self) -> int:
+        """Number of live (non-deleted) vectors."""
+        return len(self.metadb)
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("FaissIndex was loaded read-only (mmap); writes must go through a writable instance")
+
+    def add(self, vectors: np.ndarray, metadata_list: List[Dict[str, Any]]) -> List[int]:
+        """
+        Add vectors and metadata to the index under freshly assigned ids.
 
         Args:
             vectors: np.ndarray of shape (num_vectors, dim)
             metadata_list: List of metadata dicts aligned with vectors
+
+        Returns:
+            Stable vector ids assigned to the new entries
         """
+        self._check_writable()
         vectors = np.asarray(vectors).astype('float32')
-        self.index.add(vectors)
-        self.metadb.extend(metadata_list)
+        with self._lock:
+            start = self.metadb.next_id()
+            ids = np.arange(start, start + len(metadata_list), dtype='int64')
+            if self.wal is not None:
+                self.wal.append(ids, vectors)
+            if self.vectors is not None:
+                self.vectors.append(ids, vectors)
+            self.metadb.append(ids.tolist(), metadata_list, vectors)
+            self._router = None
+            with self._search_lock.write():
+                self.index.add_with_ids(vectors, ids)
+            if self.wal is not None and self.wal.num_vectors >= WAL_SNAPSHOT_EVERY:
+                self.save()
+        return ids.tolist()
+
+    def remove(self, pdf_id: Optional[str]) -> int:
+        """
+        Tombstone every vector of a document. The graph entries are dropped
+        by the next compaction.
+
+        Returns:
+            Number of vectors removed
+        """
+        self._check_writable()
+        with self._lock:
+            removed = self.metadb.tombstone_pdf(pdf_id)
+            self._router = None
+            self._tombstones = None
+        if removed:
+            self.maybe_compact()
+        return removed
+
+    def upsert(self, pdf_id: Optional[str], vectors: np.ndarray, metadata_list: List[Dict[str, Any]]) -> List[int]:
+        """
+        Replace all vectors of a document with a new set.
+
+        Returns:
+            Stable vector ids assigned to the new entries
+        """
+        self._check_writable()
+        with self._lock:
+            self.metadb.tombstone_pdf(pdf_id)
+            self._tombstones = None
+            ids = self.add(vectors, metadata_list)
+        self.maybe_compact()
+        return ids
+
+    def _tombstone_selector(self):
+        """
+        Selector excluding tombstoned ids, built once per change of the
+        tombstone set instead of per search (caller holds the lock).
+
+        Returns:
+            (IDSelectorBatch, IDSelectorNot), or (None, None) without tombstones
+        """
+        version = self.metadb.tombstone_version()
+        if self._tombstones is None or self._tombstones[0] != version:
+            deleted = self.metadb.deleted_ids()
+            if deleted:
+                batch = faiss.IDSelectorBatch(np.asarray(deleted, dtype='int64'))
+                self._tombstones = (version, batch, faiss.IDSelectorNot(batch))
+            else:
+                self._tombstones = (version, None, None)
+        return self._tombstones[1], self._tombstones[2]
+
+    def _search_params(self, ids: Optional[List[int]] = None) -> Optional[faiss.SearchParameters]:
+        """
+        Build search parameters restricting results to `ids` when given,
+        otherwise excluding tombstoned ids. Returns None when no selector is needed.
+        """
+        if ids is None:
+            batch, sel = self._tombstone_selector()
+            if sel is None:
+                return None
+        else:
+            batch = faiss.IDSelectorBatch(np.asarray(ids, dtype='int64'))
+            sel = batch
+        if self.hnsw is not None:
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = self.hnsw.efSearch
+        else:
+            params = faiss.SearchParameters()
+        params.sel = sel
+        # keep the selectors alive as long as the params object
+        params._refs = (batch, sel)
+        return params
+
+    def _exact_search(self, q: np.ndarray, ids: List[int], top_k: int):
+        """Brute-force L2 search over a small set of vector ids."""
+        ids_arr = np.asarray(ids, dtype='int64')
+        vecs = self._reconstruct(ids_arr)
+        dists = ((q ** 2).sum(axis=1)[:, None] - 2 * q @ vecs.T + (vecs ** 2).sum(axis=1)[None, :])
+        k = min(top_k, len(ids_arr))
+        order = np.argpartition(dists, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(order, np.argsort(np.take_along_axis(dists, order, axis=1), axis=1), axis=1)
+        D = np.take_along_axis(dists, order, axis=1).astype('float32')
+        I = ids_arr[order]
+        if k < top_k:
+            pad = top_k - k
+            D = np.hstack([D, np.full((len(q), pad), np.inf, dtype='float32')])
+            I = np.hstack([I, np.full((len(q), pad), -1, dtype='int64')])
+        return D, I
+
+    def _search_all(self, q: np.ndarray, top_k: int, params):
+        """Search the main index and, if present, the read-only delta index."""
+        D, I = self.index.search(q, top_k, params=params)
+        if self._delta is not None:
+            D, I = merge_topk([(D, I), self._delta.search(q, top_k, params=params)], top_k)
+        return D, I
+
+    def search_raw(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, Iterable[str]]] = None
+    ):
+        """
+        Search without resolving metadata.
+
+        Args:
+            query_vectors: Query vectors of shape (num_queries, dim)
+            top_k: Number of top hits per query
+            pdf_id: Optional document id (or ids) to restrict the search to
+
+        Returns:
+            (D, I) arrays of L2 distances and vector ids; missing hits have id -1
+        """
+        q = np.asarray(query_vectors).astype('float32').reshape(-1, self.dim)
+        # The lock only covers building the selector; the search itself runs
+        # concurrently with other searches, compaction and metadata writes
+        scope = params = None
+        with self._lock:
+            if pdf_id is None:
+                params = self._search_params()
+            else:
+                pdf_ids = [pdf_id] if isinstance(pdf_id, str) else list(pdf_id)
+                scope = self.metadb.ids_for_pdfs(pdf_ids)
+                if not scope:
+                    return (np.full((len(q), top_k), np.inf, dtype='float32'),
+                            np.full((len(q), top_k), -1, dtype='int64'))
+                if len(scope) > FILTER_EXACT_SEARCH_MAX:
+                    params = self._search_params(scope)
+        with self._search_lock.read():
+            if scope is not None and params is None:
+                return self._exact_search(q, scope, top_k)
+            return self._search_all(q, top_k, params)
+
+    def annotate(self, ids: Iterable[int], fields: List[Dict[str, Any]]) -> int:
+        """Merge extra metadata (e.g. per-chunk summaries) into stored chunks."""
+        return self.metadb.annotate(ids, fields)
+
+    def hits_for(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Metadata dicts (with their vector `id`) for search result ids, in order."""
+        ids = [int(i) for i in ids if i >= 0]
+        return [
+            dict(meta, id=vid)
+            for vid, meta in zip(ids, self.metadb.get_many(ids))
+            if meta is not None
+        ]
 
-    def search(self, query_vector: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, Iterable[str]]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Search the FAISS index for nearest neighbors.
 
         Args:
             query_vector: Single query vector of shape (dim,)
             top_k: Number of top hits to return
+            pdf_id: Optional document id (or ids) to restrict the search to
 
         Returns:
-            List of metadata dicts corresponding to top hits
+            List of metadata dicts corresponding to top hits, each with its vector `id`
         """
-        q = np.asarray([query_vector]).astype('float32')
-        D, I = self.index.search(q, top_k)
-        hits: List[Dict[str, Any]] = []
-        for idx in I[0]:
-            if idx < len(self.metadb):
-                hits.append(self.metadb[idx])
-        return hits
+        D, I = self.search_raw(np.asarray([query_vector]), top_k=top_k, pdf_id=pdf_id)
+        return self.hits_for(I[0])
 
-    def save(self, index_path: Optional[Path] = FAISS_INDEX_PATH, meta_path: Optional[Path] = METADATA_DB):
+    def num_documents(self) -> int:
+        """Number of documents with live chunks."""
+        return self.metadb.num_documents()
+
+    def route_documents(self, query_vector: np.ndarray, top_n: int) -> List[tuple]:
         """
-        Persist FAISS index and metadata to disk.
+        Rank documents by inner product between the query and their centroid.
 
         Args:
-            index_path: Path to save FAISS index
-            meta_path: Path to save metadata JSON
+            query_vector: Single query vector of shape (dim,)
+            top_n: Number of documents to return
+
+        Returns:
+            List of (pdf_id, score) pairs, best first
         """
-        index_path = Path(index_path)
-        meta_path = Path(meta_path)
+        with self._lock:
+            if self._router is None:
+                pdf_ids, sums, counts = self.metadb.centroids()
+                if pdf_ids:
+                    centroids = sums / counts[:, None]
+                    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+                    centroids = (centroids / np.maximum(norms, 1e-12)).astype('float32')
+                else:
+                    centroids = np.zeros((0, self.dim), dtype='float32')
+                self._router = (pdf_ids, centroids)
+            pdf_ids, centroids = self._router
+        if not pdf_ids:
+            return []
+        scores = centroids @ np.asarray(query_vector, dtype='float32').reshape(-1)
+        top = np.argsort(-scores)[:top_n]
+        return [(pdf_ids[i], float(scores[i])) for i in top]
+
+    def maybe_compact(self, threshold: float = COMPACTION_TOMBSTONE_RATIO):
+        """
+        Start a background compaction if the share of tombstoned vectors
+        exceeds threshold and no compaction is already running.
+        """
+        total = self.index.ntotal
+        if self.read_only or total == 0 or self.metadb.num_deleted() / total < threshold:
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self.compact, name="faiss-compaction", daemon=True)
+        self._compaction.start()
+
+    def compact(self):
+        """
+        Rebuild the index without tombstoned vectors and purge their metadata
+        rows. Vectors added while the index is being rebuilt are carried over
+        before the new index is swapped in.
+        """
+        with self._lock:
+            deleted = set(self.metadb.deleted_ids())
+            all_ids = faiss.vector_to_array(self.index.id_map)
+            live_ids, live_vecs = self.live_vectors()
+
+        # Building the graph is the slow part; searches and adds continue meanwhile
+        new_index = self._new_index()
+        if len(live_ids):
+            if not new_index.is_trained:
+                new_index.train(live_vecs)
+            new_index.add_with_ids(live_vecs, live_ids)
+
+        with self._lock:
+            seen = set(all_ids.tolist())
+            late_ids = np.asarray(
+                [i for i in faiss.vector_to_array(self.index.id_map) if int(i) not in seen],
+                dtype='int64'
+            )
+            if len(late_ids):
+                new_index.add_with_ids(self._reconstruct(late_ids), late_ids)
+            self.index = new_index
+            if self.index_path is not None:
+                # Snapshot before purging so the file on disk never references purged rows
+                self.save()
+            self.metadb.purge(sorted(deleted))
+            self._tombstones = None
+
+    def rebuild_from_vectors(self, index_factory: Optional[str] = None):
+        """
+        Rebuild the index from the raw vector store, optionally as a different
+        index type, and persist the choice so later rebuilds keep it.
+
+        Args:
+            index_factory: faiss index_factory string (e.g. "IVF256,Flat",
+                "HNSW16,SQ8"); None restores the tuned HNSWFlat
+        """
+        self._check_writable()
+        if index_factory and not len(self):
+            raise ValueError("Cannot build a trained index type from an empty vector store")
+        with self._lock:
+            self.index_factory = index_factory
+            self.metadb.set_meta("index_factory", index_factory)
+        self.compact()
+
+    def chunks(self):
+        """(vector id, metadata) for every live chunk."""
+        return self.metadb.items()
+
+    def live_vectors(self):
+        """
+        All non-tombstoned vectors currently in the index.
+
+        Returns:
+            (ids, vectors) arrays
+        """
+        with self._lock:
+            deleted = set(self.metadb.deleted_ids())
+            all_ids = faiss.vector_to_array(self.index.id_map)
+            live_ids = np.asarray([i for i in all_ids if int(i) not in deleted], dtype='int64')
+            return live_ids, self._reconstruct(live_ids)
+
+    def _reconstruct(self, ids: np.ndarray) -> np.ndarray:
+        if len(ids) == 0:
+            return np.zeros((0, self.dim), dtype='float32')
+        if self.vectors is not None and self.vectors.covers(ids):
+            return self.vectors.get(ids)
+        return np.vstack([
+            (self._delta if int(i) in self._delta_ids else self.index).reconstruct(int(i))
+            for i in ids
+        ]).astype('float32')
+
+    def save(self, index_path: Optional[Path] = None):
+        """
+        Snapshot the FAISS index to disk. The file is written next to the
+        target and atomically renamed over it, so a crash leaves either the
+        old or the new snapshot intact. Saving to the bound index path also
+        empties the write-ahead log, whose vectors the snapshot now contains.
+        Chunk metadata is already written incrementally by the chunk store.
+
+        Args:
+            index_path: Path to save FAISS index; defaults to the bound path
+        """
+        self._check_writable()
+        index_path = Path(index_path or self.index_path or FAISS_INDEX_PATH)
         index_path.parent.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self.index, str(index_path))
-        with open(meta_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadb, f, ensure_ascii=False, indent=2)
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        with self._lock:
+            if self.vectors is not None:
+                self.vectors.sync()
+            faiss.write_index(self.index, str(tmp_path))
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, index_path)
+            if self.wal is not None and index_path == self.index_path:
+                self.wal.reset()
+
+    def _replay_wal(self):
+        """
+        Re-apply logged vectors missing from the loaded snapshot. Records whose
+        ids are already in the index (crash between snapshot and log reset) or
+        that have no live chunk row (crash before the metadata commit, or
+        deleted since) are skipped.
+        """
+        present = set(faiss.vector_to_array(self.index.id_map).tolist())
+        target = self.index
+        if self.read_only:
+            # The mmapped snapshot cannot grow; keep the log tail in a flat side index
+            self._delta = faiss.IndexIDMap2(faiss.IndexFlatL2(self.dim))
+            target = self._delta
+        replayed = 0
+        # A read-only reader must not repair the log: a writer may be mid-append
+        for ids, vectors in self.wal.replay(repair=not self.read_only):
+            if self.vectors is not None and not self.read_only:
+                self.vectors.append(ids, vectors)
+            candidates = [int(i) for i in ids if int(i) not in present]
+            live = set(self.metadb.live_ids(candidates))
+            mask = np.asarray([int(i) in live for i in ids], dtype=bool)
+            if mask.any():
+                target.add_with_ids(vectors[mask], ids[mask])
+                present.update(ids[mask].tolist())
+                replayed += int(mask.sum())
+        if self.read_only:
+            self._delta_ids = set(faiss.vector_to_array(self._delta.id_map).tolist())
+        if replayed:
+            print(f"Replayed {replayed} vectors from write-ahead log {self.wal.path}")
 
     @classmethod
-    def load(cls, dim: int, index_path: Optional[Path] = FAISS_INDEX_PATH, meta_path: Optional[Path] = METADATA_DB):
+    def load(
+        cls,
+        dim: int,
+        index_path: Optional[Path] = FAISS_INDEX_PATH,
+        store_path: Optional[Path] = CHUNK_STORE_PATH,
+        legacy_meta_path: Optional[Path] = METADATA_DB,
+        wal_path: Optional[Path] = FAISS_WAL_PATH,
+        mmap: bool = False,
+        id_base: int = 0,
+        vector_path: Optional[Path] = FAISS_VECTORS_PATH
+    ):
         """
-        Load FAISS index and metadata from disk.
+        Load the last FAISS snapshot from disk, open its chunk store and
+        replay the write-ahead log on top of it.
 
         Args:
             dim: Dimension of embedding vectors
             index_path: Path of saved FAISS index
-            meta_path: Path of saved metadata JSON
+            store_path: Path of the SQLite chunk store
+            legacy_meta_path: Old JSON metadata list, imported once if the store is empty
+            wal_path: Write-ahead log path; None disables logging
+            mmap: Memory-map the snapshot read-only instead of reading it into the heap
+            id_base: First vector id assigned by an empty index
+            vector_path: Raw vector store path; None disables it
 
         Returns:
             FaissIndex instance with loaded index and metadata
         """
-        inst = cls(dim)
+        inst = cls(dim, store_path=store_path, id_base=id_base)
+        inst.read_only = mmap
         index_path = Path(index_path)
-        meta_path = Path(meta_path)
         if index_path.exists():
-            inst.index = faiss.read_index(str(index_path))
-        if meta_path.exists():
-            inst.metadb = json.loads(meta_path.read_text(encoding='utf-8'))
+            io_flags = 0
+            if mmap:
+                # IO_FLAG_MMAP_IFC maps the flat vector storage in place (faiss >= 1.11)
+                io_flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+            index = faiss.read_index(str(index_path), io_flags)
+            if isinstance(index, faiss.IndexIDMap2):
+                inst.index = index
+                if inst.hnsw is not None:
+                    inst.hnsw.efSearch = inst.hnsw_params["efSearch"]
+            elif index.ntotal:
+                # Positional index from before stable ids: position becomes the id
+                inst.index.add_with_ids(
+                    index.reconstruct_n(0, index.ntotal),
+                    np.arange(index.ntotal, dtype='int64')
+                )
+        if legacy_meta_path is not None and inst.metadb.next_id() == 0:
+            legacy_meta_path = Path(legacy_meta_path)
+            if legacy_meta_path.exists():
+                legacy = json.loads(legacy_meta_path.read_text(encoding='utf-8'))
+                inst.metadb.append(range(len(legacy)), legacy)
+        inst.index_path = index_path
+        if vector_path is not None and not (mmap and not Path(vector_path).exists()):
+            inst.vectors = VectorStore(vector_path, dim, dtype=VECTOR_STORE_DTYPE, id_base=id_base, read_only=mmap)
+            if not mmap and len(inst.vectors) == 0 and inst.index.ntotal:
+                # Index built before the vector store existed: backfill it once
+                ids = np.sort(faiss.vector_to_array(inst.index.id_map))
+                inst.vectors.append(ids, inst._reconstruct(ids))
+                inst.vectors.sync()
+        if wal_path is not None:
+            inst.wal = WriteAheadLog(wal_path, dim)
+            inst._replay_wal()
+        if not mmap and inst.metadb.num_documents() == 0 and len(inst.metadb):
+            # Store created before document centroids existed
+            inst.metadb.rebuild_centroids(*inst.live_vectors())
         return inst
@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class FlashcardStore:
+    """
+    Flashcards persisted per document in SQLite. Cards of a document are
+    replaced as a whole when it is re-ingested and read back in pages in
+    their generation order, through an index on (pdf_id, position).
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: SQLite file to use. None keeps the store in memory.
+        """
+        self.path: Optional[Path] = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path) if self.path is not None else ":memory:",
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS flashcards ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, pdf_id TEXT, position INTEGER NOT NULL, "
+            "question TEXT NOT NULL, answer TEXT NOT NULL, source TEXT, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_flashcards_pdf ON flashcards(pdf_id, position)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def replace(self, pdf_id: Optional[str], cards: List[Dict[str, Any]]) -> int:
+        """
+        Store the cards of a document, dropping its earlier cards. Cards
+        without a pdf_id are appended instead (there is nothing to replace).
+
+        Args:
+            pdf_id: Document the cards belong to
+            cards: Dicts with 'question', 'answer' and optional 'source'
+
+        Returns:
+            Number of cards stored
+        """
+        now = time.time()
+        rows = [
+            (pdf_id, pos, str(card.get("question", "")), str(card.get("answer", "")), card.get("source"), now)
+            for pos, card in enumerate(cards)
+            if isinstance(card, dict) and card.get("question") and card.get("answer")
+        ]
+        with self._lock:
+            if pdf_id is not None:
+                self._conn.execute("DELETE FROM flashcards WHERE pdf_id = ?", (pdf_id,))
+            self._conn.executemany(
+                "INSERT INTO flashcards (pdf_id, position, question, answer, source, created) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def remove_pdf(self, pdf_id: str) -> int:
+        """Delete a document's cards; returns how many were removed."""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM flashcards WHERE pdf_id = ?", (pdf_id,)).rowcount
+            self._conn.commit()
+        return removed
+
+    def count(self, pdf_id: Optional[str] = None) -> int:
+        with self._lock:
+            if pdf_id is None:
+                return self._conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM flashcards WHERE pdf_id = ?", (pdf_id,)).fetchone()[0]
+
+    def page(self, pdf_id: Optional[str] = None, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        One page of cards, optionally of one document, in generation order
+        (documents in the order they were stored).
+        """
+        with self._lock:
+            if pdf_id is None:
+                rows = self._conn.execute(
+                    "SELECT pdf_id, question, answer, source FROM flashcards ORDER BY id LIMIT ? OFFSET ?",
+                    (limit, offset)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT pdf_id, question, answer, source FROM flashcards WHERE pdf_id = ? "
+                    "ORDER BY position LIMIT ? OFFSET ?",
+                    (pdf_id, limit, offset)
+                ).fetchall()
+        return [{"pdf_id": p, "question": q, "answer": a, "source": s} for p, q, a, s in rows]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM flashcards")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
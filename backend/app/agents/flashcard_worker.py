@@ -0,0 +1,39 @@
+"""
+Sentence tagging for flashcard generation, run by the tagging worker
+processes. Spawned workers import this module by its qualified name; it
+depends only on NLTK, and the app packages load their agents lazily, so
+the workers never load the embedding or summarization models.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+
+
+@lru_cache(maxsize=1)
+def tagger():
+    """POS tagger loaded once per process (nltk.pos_tag reloads it on every call)."""
+    from nltk.tag import PerceptronTagger
+    return PerceptronTagger()
+
+
+def tag_sentences(text: str) -> Tuple[List[str], List[List[Tuple[str, str]]]]:
+    """Sentences of text and their POS tags, tagged in one batch (as nltk.pos_tag_sents)."""
+    from nltk.tokenize import sent_tokenize, word_tokenize
+
+    sents = sent_tokenize(text)
+    return sents, tagger().tag_sents([word_tokenize(s) for s in sents])
+
+
+def candidate_sentences(texts: List[str]) -> List[List[Tuple[str, List[str]]]]:
+    """
+    Process pool task: for each chunk text, its sentences with the nouns
+    that could be blanked out (longer than 4 letters), tagged chunk by
+    chunk in batches.
+    """
+    out = []
+    for text in texts:
+        sents, tagged = tag_sentences(text)
+        out.append([
+            (s, [w for w, t in tags if t.startswith("NN") and len(w) > 4 and w.isalpha()])
+            for s, tags in zip(sents, tagged)
+        ])
+    return out
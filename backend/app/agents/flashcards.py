@@ -1,9 +1,21 @@
-from typing import List, Dict, Callable, Optional
+import math
+import multiprocessing
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Callable, Optional, Tuple
 import nltk
+from .config import (
+    MAX_FLASHCARDS_PER_DOC, FLASHCARD_WORKERS, FLASHCARD_PARALLEL_MIN_CHUNKS,
+    FLASHCARD_DEDUP_THRESHOLD, FLASHCARD_MAX_PER_ANSWER
+)
+from .flashcard_worker import tagger, tag_sentences as _tag_sentences, candidate_sentences as _candidate_sentences
 
 # Ensure necessary NLTK data is downloaded
 nltk.download('punkt', quiet=True)
 nltk.download('averaged_perceptron_tagger', quiet=True)
+nltk.download('averaged_perceptron_tagger_eng', quiet=True)
 
 
 def simple_flashcards_from_text(text: str, max_cards: int = 10) -> List[Dict[str, str]]:
@@ -18,14 +30,10 @@ def simple_flashcards_from_text(text: str, max_cards: int = 10) -> List[Dict[str
     Returns:
         List of flashcards as dicts with keys: 'question', 'answer', 'source'.
     """
-    from nltk.tokenize import sent_tokenize, word_tokenize
-
-    sents = sent_tokenize(text)
+    sents, tagged = _tag_sentences(text)
     cards: List[Dict[str, str]] = []
 
-    for s in sents[:max_cards]:
-        words = word_tokenize(s)
-        tags = nltk.pos_tag(words)
+    for s, tags in zip(sents[:max_cards], tagged):
         blank: Optional[str] = None
 
         for w, t in tags:
@@ -44,6 +52,111 @@ def simple_flashcards_from_text(text: str, max_cards: int = 10) -> List[Dict[str
     return cards
 
 
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Shared process pool for tagging. Workers are spawned rather than forked
+    (forking the threaded server can deadlock the child on a lock held by
+    another thread); they import only app.agents.flashcard_worker and load
+    the tagger once at start.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=tagger)
+        return _pool
+
+
+def _tag_chunks(texts: List[str], workers: int) -> List[List[Tuple[str, List[str]]]]:
+    """_candidate_sentences over all chunks, split across worker processes for large documents."""
+    global _pool
+    pool = _get_pool(workers) if workers > 1 and len(texts) >= FLASHCARD_PARALLEL_MIN_CHUNKS else None
+    if pool is None:
+        return _candidate_sentences(texts)
+    # Contiguous batches, so concatenating the results keeps chunk order
+    size = -(-len(texts) // (workers * 4))
+    batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+    try:
+        return [chunk for batch in pool.map(_candidate_sentences, batches) for chunk in batch]
+    except Exception as e:
+        print(f"Parallel flashcard tagging failed, tagging in process: {e}")
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown(wait=False)
+        return _candidate_sentences(texts)
+
+
+def _card_tokens(question: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", question.lower()))
+
+
+def flashcards_from_chunks(
+    texts: List[str],
+    max_cards: int = MAX_FLASHCARDS_PER_DOC,
+    workers: int = FLASHCARD_WORKERS
+) -> List[Dict[str, str]]:
+    """
+    Cloze-style flashcards over every chunk of a document.
+
+    Sentences are POS-tagged chunk by chunk with one cached tagger, in
+    parallel processes for large documents. Each sentence blanks out its
+    noun that recurs most in the document; cards are ranked by how
+    central their nouns are to the document. Near-identical cards (question
+    word Jaccard similarity of FLASHCARD_DEDUP_THRESHOLD or more) and
+    answers used FLASHCARD_MAX_PER_ANSWER times are skipped while the best
+    max_cards are picked.
+
+    Args:
+        texts: Chunk texts of one document, in order
+        max_cards: Maximum number of flashcards to return
+        workers: Tagging processes
+
+    Returns:
+        List of flashcards as dicts with keys: 'question', 'answer', 'source'.
+    """
+    texts = [t for t in texts if t and t.strip()]
+    if not texts:
+        return []
+    chunks = _tag_chunks(texts, workers)
+
+    # Nouns recurring across the document mark its key concepts
+    counts = Counter(n.lower() for sents in chunks for _, nouns in sents for n in set(nouns))
+    weight = lambda noun: math.log1p(counts[noun.lower()])
+
+    ranked = []
+    for sents in chunks:
+        for s, nouns in sents:
+            words = len(s.split())
+            if not nouns or words < 6 or words > 60:
+                continue
+            blank = max(nouns, key=lambda n: (counts[n.lower()], len(n)))
+            score = weight(blank) + sum(weight(n) for n in nouns) / len(nouns)
+            ranked.append((score, s, blank))
+    ranked.sort(key=lambda r: r[0], reverse=True)
+
+    cards: List[Dict[str, str]] = []
+    kept_tokens: List[set] = []
+    answers: Counter = Counter()
+    for _, s, blank in ranked:
+        if len(cards) >= max_cards:
+            break
+        if answers[blank.lower()] >= FLASHCARD_MAX_PER_ANSWER:
+            continue
+        question = s.replace(blank, "_____")
+        tokens = _card_tokens(question)
+        if any(len(tokens & kept) / max(1, len(tokens | kept)) >= FLASHCARD_DEDUP_THRESHOLD for kept in kept_tokens):
+            continue
+        cards.append({"question": question, "answer": blank, "source": s})
+        kept_tokens.append(tokens)
+        answers[blank.lower()] += 1
+    return cards
+
+
 def llm_flashcards_from_text(
     text: str,
     llm_callable: Optional[Callable[[str, int], List[Dict[str, str]]]] = None,
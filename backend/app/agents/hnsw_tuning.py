@@ -0,0 +1,95 @@
+import time
+import faiss
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence
+from .config import TOP_K_RETRIEVAL, TUNE_TARGET_RECALL, TUNE_MEMORY_BUDGET_MB, TUNE_NUM_QUERIES
+
+DEFAULT_M_GRID = (8, 16, 32, 48)
+DEFAULT_EF_CONSTRUCTION_GRID = (40, 100, 200)
+DEFAULT_EF_SEARCH_GRID = (16, 32, 64, 128, 256)
+
+
+def _recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of the true top-k found in the approximate top-k."""
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def sweep_hnsw(
+    vectors: np.ndarray,
+    k: int = TOP_K_RETRIEVAL,
+    num_queries: int = TUNE_NUM_QUERIES,
+    m_grid: Sequence[int] = DEFAULT_M_GRID,
+    ef_construction_grid: Sequence[int] = DEFAULT_EF_CONSTRUCTION_GRID,
+    ef_search_grid: Sequence[int] = DEFAULT_EF_SEARCH_GRID,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Measure recall@k, index size and query latency of HNSW configurations.
+
+    A random sample of the vectors is held out as queries; ground truth is
+    their exact top-k over the remaining vectors from a flat inner-product
+    index (embeddings are normalized, so this matches the L2 ranking).
+    Each (M, efConstruction) graph is built once and swept over efSearch.
+
+    Args:
+        vectors: Indexed chunk embeddings, shape (n, dim)
+        k: Cut-off for recall
+        num_queries: Number of held-out sample queries
+
+    Returns:
+        One dict per configuration with M, efConstruction, efSearch,
+        recall, memory_mb and latency_ms (mean per query)
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    n, dim = vectors.shape
+    rng = np.random.default_rng(seed)
+    num_queries = min(num_queries, max(1, n // 10))
+    perm = rng.permutation(n)
+    queries, base = vectors[perm[:num_queries]], vectors[perm[num_queries:]]
+    k = min(k, len(base))
+
+    flat = faiss.IndexFlatIP(dim)
+    flat.add(base)
+    _, truth = flat.search(queries, k)
+
+    results: List[Dict[str, Any]] = []
+    for m in m_grid:
+        for ef_c in ef_construction_grid:
+            index = faiss.IndexHNSWFlat(dim, m)
+            index.hnsw.efConstruction = ef_c
+            index.add(base)
+            memory_mb = faiss.serialize_index(index).nbytes / 2 ** 20
+            for ef_s in ef_search_grid:
+                index.hnsw.efSearch = ef_s
+                start = time.perf_counter()
+                _, found = index.search(queries, k)
+                latency_ms = (time.perf_counter() - start) * 1000 / num_queries
+                results.append({
+                    "M": m,
+                    "efConstruction": ef_c,
+                    "efSearch": ef_s,
+                    "recall": _recall_at_k(found, truth),
+                    "memory_mb": memory_mb,
+                    "latency_ms": latency_ms,
+                })
+    return results
+
+
+def pick_hnsw_config(
+    results: List[Dict[str, Any]],
+    target_recall: float = TUNE_TARGET_RECALL,
+    memory_budget_mb: Optional[float] = TUNE_MEMORY_BUDGET_MB
+) -> Optional[Dict[str, Any]]:
+    """
+    Cheapest configuration meeting the recall target within the memory
+    budget: lowest query latency, then smallest index, then cheapest build.
+    Returns None if no configuration qualifies.
+    """
+    ok = [
+        r for r in results
+        if r["recall"] >= target_recall and (memory_budget_mb is None or r["memory_mb"] <= memory_budget_mb)
+    ]
+    if not ok:
+        return None
+    return min(ok, key=lambda r: (round(r["latency_ms"], 3), r["memory_mb"], r["efConstruction"], r["efSearch"]))
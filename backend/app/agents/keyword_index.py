@@ -0,0 +1,189 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Iterable, Union
+from .config import BM25_K1, BM25_B, KEYWORD_QUERY_MAX_TERMS, RRF_K
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Kept small on purpose: only words that carry no lookup intent
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+# Leading words that mark a natural-language question rather than a term lookup
+_QUESTION_WORDS = frozenset(
+    "what why how when where which who whom whose explain describe compare define "
+    "difference differences list give tell summarize summarise does do can should".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms, stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class KeywordIndex:
+    """
+    Inverted index over chunk texts with BM25 scoring, stored in SQLite next
+    to the FAISS files and keyed by the same vector ids. Gives exact-term
+    lookups ("BCNF", "two-phase locking") a path that needs neither the
+    embedding model nor the HNSW graph.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: SQLite file to use. None keeps the index in memory.
+        """
+        self.path: Optional[Path] = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.path) if self.path is not None else ":memory:",
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, pdf_id TEXT, length INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_docs_pdf_id ON docs(pdf_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_id ON postings(id)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def add(self, ids: Sequence[int], metadata_list: List[Dict[str, Any]]):
+        """Index chunk texts under their vector ids in one transaction."""
+        docs, postings = [], []
+        for vid, meta in zip(ids, metadata_list):
+            terms = tokenize(meta.get("text", ""))
+            docs.append((int(vid), meta.get("pdf_id"), len(terms)))
+            postings.extend((term, int(vid), tf) for term, tf in Counter(terms).items())
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO docs (id, pdf_id, length) VALUES (?, ?, ?)", docs)
+            self._conn.executemany("INSERT OR REPLACE INTO postings (term, id, tf) VALUES (?, ?, ?)", postings)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM docs")
+            self._conn.commit()
+
+    def remove_pdf(self, pdf_id: Optional[str]) -> int:
+        """Drop every chunk of a document. Returns the number removed."""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT id FROM docs WHERE pdf_id IS ?", (pdf_id,))]
+            self._conn.executemany("DELETE FROM postings WHERE id = ?", [(i,) for i in ids])
+            self._conn.execute("DELETE FROM docs WHERE pdf_id IS ?", (pdf_id,))
+            self._conn.commit()
+        return len(ids)
+
+    def is_keyword_query(self, query: str) -> bool:
+        """
+        Heuristic for term lookups: a quoted query, or a short query that is
+        not phrased as a question and whose terms all occur in the corpus.
+        """
+        stripped = query.strip()
+        if len(stripped) > 2 and stripped[0] == stripped[-1] and stripped[0] in "\"'":
+            return True
+        words = _TOKEN_RE.findall(stripped.lower())
+        if not words or words[0] in _QUESTION_WORDS or stripped.endswith("?"):
+            return False
+        terms = tokenize(stripped)
+        if not terms or len(terms) > KEYWORD_QUERY_MAX_TERMS:
+            return False
+        with self._lock:
+            known = self._conn.execute(
+                f"SELECT COUNT(DISTINCT term) FROM postings WHERE term IN ({','.join('?' * len(set(terms)))})",
+                list(set(terms))
+            ).fetchone()[0]
+        return known == len(set(terms))
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, Iterable[Optional[str]]]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Rank chunks by BM25 against the query terms.
+
+        Args:
+            query: Query text
+            top_k: Number of hits to return
+            pdf_id: Optional document id (or ids) to restrict the search to
+
+        Returns:
+            List of (vector id, score) pairs, best first
+        """
+        terms = Counter(tokenize(query))
+        if not terms:
+            return []
+        scope = None
+        if pdf_id is not None:
+            scope = [pdf_id] if isinstance(pdf_id, str) else list(pdf_id)
+        with self._lock:
+            n_docs, total_len = self._conn.execute("SELECT COUNT(*), SUM(length) FROM docs").fetchone()
+            if not n_docs:
+                return []
+            avg_len = total_len / n_docs
+            placeholders = ",".join("?" * len(terms))
+            df = dict(self._conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term",
+                list(terms)
+            ).fetchall())
+            query_sql = (
+                f"SELECT p.term, p.id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.id "
+                f"WHERE p.term IN ({placeholders})"
+            )
+            params: List[Any] = list(terms)
+            if scope is not None:
+                named = [p for p in scope if p is not None]
+                clauses = []
+                if named:
+                    clauses.append(f"d.pdf_id IN ({','.join('?' * len(named))})")
+                    params.extend(named)
+                if len(named) < len(scope):
+                    clauses.append("d.pdf_id IS NULL")
+                query_sql += f" AND ({' OR '.join(clauses)})"
+            rows = self._conn.execute(query_sql, params).fetchall()
+
+        scores: Dict[int, float] = {}
+        for term, vid, tf, length in rows:
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+            scores[vid] = scores.get(vid, 0.0) + terms[term] * idf * norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], top_k: int, k: int = RRF_K) -> List[int]:
+    """
+    Fuse several ranked id lists: score(id) = sum 1 / (k + rank).
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, vid in enumerate(ranking):
+            scores[vid] = scores.get(vid, 0.0) + 1.0 / (k + rank + 1)
+    return [vid for vid, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]]
@@ -4,37 +4,39 @@ Safe summarization module that avoids the list index out of range error.
 
 from typing import List, Dict, Any
 import re
+from .extractive import top_sentences
+
+def safe_extractive_summarize_many(texts: List[str], max_sentences: int = 3) -> List[str]:
+    """
+    Safe extractive summarization of many texts, scored in one pass.
+    """
+    results = []
+    long_texts, sentence_lists, positions = [], [], []
+    for text in texts:
+        if not text or not text.strip():
+            results.append("No content available for summarization.")
+            continue
+
+        # Split into sentences
+        sentences = re.split(r'[.!?]+', text)
+        sentences = [s.strip() for s in sentences if s.strip()]
+        results.append(text)
+        if len(sentences) > max_sentences:
+            positions.append(len(results) - 1)
+            long_texts.append(text)
+            sentence_lists.append(sentences)
+
+    # Score by length and word frequency; keep the top sentences
+    selected = top_sentences(sentence_lists, long_texts, top_k=max_sentences, length_divisor=1)
+    for i, top in zip(positions, selected):
+        results[i] = ". ".join(top) + "."
+    return results
 
 def safe_extractive_summarize(text: str, max_sentences: int = 3) -> str:
     """
     Safe extractive summarization that never fails.
     """
-    if not text or not text.strip():
-        return "No content available for summarization."
-    
-    # Split into sentences
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    
-    if len(sentences) <= max_sentences:
-        return text
-    
-    # Simple scoring based on length and word frequency
-    word_freq = {}
-    for word in text.lower().split():
-        if len(word) > 3:
-            word_freq[word] = word_freq.get(word, 0) + 1
-    
-    scored_sentences = []
-    for sentence in sentences:
-        score = len(sentence) + sum(word_freq.get(word.lower(), 0) for word in sentence.split())
-        scored_sentences.append((score, sentence))
-    
-    # Sort by score and take top sentences
-    scored_sentences.sort(reverse=True)
-    top_sentences = [sentence for _, sentence in scored_sentences[:max_sentences]]
-    
-    return ". ".join(top_sentences) + "."
+    return safe_extractive_summarize_many([text], max_sentences=max_sentences)[0]
 
 def safe_chunk_summarize(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -46,19 +48,14 @@ def safe_chunk_summarize(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
             "final_summary": "No content available for summarization."
         }
     
-    summaries = []
-    for chunk in chunks:
-        text = chunk.get("text", "")
-        if not text or not text.strip():
-            continue
+    valid = [chunk for chunk in chunks if chunk.get("text", "") and chunk.get("text", "").strip()]
             
-        # Use safe extractive summarization
-        summary = safe_extractive_summarize(text, max_sentences=2)
-        summaries.append({
-            "page": chunk.get("page"),
-            "summary": summary,
-            "orig": text
-        })
+    # Use safe extractive summarization, scoring all chunks together
+    per_chunk = safe_extractive_summarize_many([chunk["text"] for chunk in valid], max_sentences=2)
+    summaries = [
+        {"page": chunk.get("page"), "summary": summary, "orig": chunk["text"]}
+        for chunk, summary in zip(valid, per_chunk)
+    ]
     
     if not summaries:
         return {
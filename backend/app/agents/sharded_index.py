@@ -0,0 +1,224 @@
+import zlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union, Iterable
+from .config import (
+    FAISS_INDEX_PATH, CHUNK_STORE_PATH, FAISS_WAL_PATH, FAISS_VECTORS_PATH,
+    FAISS_NUM_SHARDS, FAISS_SHARD_PARTITION
+)
+from .faiss_index import FaissIndex, merge_topk
+
+# Vector ids carry their shard number in the high bits so they stay unique
+# across shards and route back to the owning shard without a lookup.
+SHARD_ID_SHIFT = 48
+
+
+def shard_path(path: Path, shard: int) -> Path:
+    """faiss_index.bin -> faiss_index.shard3.bin"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.shard{shard}{path.suffix}")
+
+
+class ShardedFaissIndex:
+    """
+    Partitions vectors across N independent FaissIndex shards, each with its
+    own snapshot, WAL and chunk store. A document always lives in exactly one
+    shard, chosen by a stable hash of its pdf_id or, with size partitioning,
+    by whichever shard is smallest when it is first ingested. Adds only touch
+    that shard's (smaller) graph; searches fan out to the shards in parallel
+    threads and the per-shard top-k lists are merged by distance.
+    """
+
+    def __init__(self, shards: List[FaissIndex], partition: str = FAISS_SHARD_PARTITION):
+        """
+        Args:
+            shards: Shard indexes; shard i must assign ids starting at i << SHARD_ID_SHIFT
+            partition: "hash" (by pdf_id) or "size" (new documents go to the smallest shard)
+        """
+        if partition not in ("hash", "size"):
+            raise ValueError(f"Unknown shard partition: {partition}")
+        self.shards = shards
+        self.dim = shards[0].dim
+        self.partition = partition
+        self._pool = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="faiss-shard")
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self.shards)
+
+    @property
+    def read_only(self) -> bool:
+        return any(s.read_only for s in self.shards)
+
+    def _shard_of_id(self, vid: int) -> int:
+        return int(vid) >> SHARD_ID_SHIFT
+
+    def _owner(self, pdf_id: Optional[str]) -> Optional[int]:
+        """Shard already holding a document, if any."""
+        if self.partition == "hash":
+            return zlib.crc32(str(pdf_id).encode("utf-8")) % len(self.shards)
+        for i, shard in enumerate(self.shards):
+            if shard.metadb.ids_for_pdf(pdf_id):
+                return i
+        return None
+
+    def _route(self, pdf_id: Optional[str], pending: Optional[List[int]] = None) -> int:
+        """
+        Shard a document's vectors go to. `pending` holds vectors already
+        routed per shard in the current batch, so size routing spreads a
+        multi-document add.
+        """
+        owner = self._owner(pdf_id)
+        if owner is not None:
+            return owner
+        sizes = [s.index.ntotal for s in self.shards]
+        if pending is not None:
+            sizes = [size + extra for size, extra in zip(sizes, pending)]
+        return int(np.argmin(sizes))
+
+    def add(self, vectors: np.ndarray, metadata_list: List[Dict[str, Any]]) -> List[int]:
+        """
+        Add vectors, routing each document's vectors to its shard.
+
+        Returns:
+            Vector ids aligned with the input
+        """
+        vectors = np.asarray(vectors).astype('float32')
+        by_pdf: Dict[Optional[str], List[int]] = {}
+        for pos, meta in enumerate(metadata_list):
+            by_pdf.setdefault(meta.get("pdf_id"), []).append(pos)
+        pending = [0] * len(self.shards)
+        groups: Dict[int, List[int]] = {}
+        for pdf_id, positions in by_pdf.items():
+            shard = self._route(pdf_id, pending)
+            pending[shard] += len(positions)
+            groups.setdefault(shard, []).extend(positions)
+        ids: List[int] = [0] * len(metadata_list)
+        for shard, positions in groups.items():
+            new_ids = self.shards[shard].add(vectors[positions], [metadata_list[p] for p in positions])
+            for pos, vid in zip(positions, new_ids):
+                ids[pos] = vid
+        return ids
+
+    def upsert(self, pdf_id: Optional[str], vectors: np.ndarray, metadata_list: List[Dict[str, Any]]) -> List[int]:
+        """Replace all vectors of a document within its shard."""
+        return self.shards[self._route(pdf_id)].upsert(pdf_id, vectors, metadata_list)
+
+    def remove(self, pdf_id: Optional[str]) -> int:
+        owner = self._owner(pdf_id)
+        if owner is None:
+            return 0
+        return self.shards[owner].remove(pdf_id)
+
+    def _target_shards(self, pdf_id: Optional[Union[str, Iterable[str]]]) -> List[int]:
+        if pdf_id is None:
+            return list(range(len(self.shards)))
+        pdf_ids = [pdf_id] if isinstance(pdf_id, str) else list(pdf_id)
+        owners = {self._owner(p) for p in pdf_ids}
+        return sorted(o for o in owners if o is not None)
+
+    def search_raw(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, Iterable[str]]] = None
+    ):
+        """
+        Scatter the search to the relevant shards in parallel and gather the
+        merged top_k. Same contract as FaissIndex.search_raw.
+        """
+        q = np.asarray(query_vectors).astype('float32').reshape(-1, self.dim)
+        targets = self._target_shards(pdf_id)
+        if not targets:
+            return (np.full((len(q), top_k), np.inf, dtype='float32'),
+                    np.full((len(q), top_k), -1, dtype='int64'))
+        futures = [self._pool.submit(self.shards[i].search_raw, q, top_k, pdf_id) for i in targets]
+        return merge_topk([f.result() for f in futures], top_k)
+
+    def num_documents(self) -> int:
+        return sum(s.num_documents() for s in self.shards)
+
+    def route_documents(self, query_vector: np.ndarray, top_n: int) -> List[tuple]:
+        """Best top_n documents across all shards by centroid score."""
+        ranked = [r for shard in self.shards for r in shard.route_documents(query_vector, top_n)]
+        ranked.sort(key=lambda r: r[1], reverse=True)
+        return ranked[:top_n]
+
+    def hits_for(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Metadata for merged result ids, fetched per owning shard, in rank order."""
+        ids = [int(i) for i in ids if i >= 0]
+        by_shard: Dict[int, List[int]] = {}
+        for vid in ids:
+            by_shard.setdefault(self._shard_of_id(vid), []).append(vid)
+        by_id = {}
+        for shard, shard_ids in by_shard.items():
+            for hit in self.shards[shard].hits_for(shard_ids):
+                by_id[hit["id"]] = hit
+        return [by_id[vid] for vid in ids if vid in by_id]
+
+    def annotate(self, ids: Iterable[int], fields: List[Dict[str, Any]]) -> int:
+        """Merge extra metadata into stored chunks, per owning shard."""
+        by_shard: Dict[int, tuple] = {}
+        for vid, new in zip(ids, fields):
+            shard_ids, shard_fields = by_shard.setdefault(self._shard_of_id(vid), ([], []))
+            shard_ids.append(int(vid))
+            shard_fields.append(new)
+        return sum(self.shards[shard].annotate(i, f) for shard, (i, f) in by_shard.items())
+
+    def chunks(self):
+        """(vector id, metadata) for every live chunk, shard by shard."""
+        for shard in self.shards:
+            yield from shard.chunks()
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, Iterable[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        D, I = self.search_raw(np.asarray([query_vector]), top_k=top_k, pdf_id=pdf_id)
+        return self.hits_for(I[0])
+
+    def save(self):
+        """Snapshot every shard independently."""
+        for shard in self.shards:
+            shard.save()
+
+    def rebuild_from_vectors(self, index_factory: Optional[str] = None):
+        """Rebuild every shard from its raw vector store, in parallel."""
+        list(self._pool.map(lambda shard: shard.rebuild_from_vectors(index_factory), self.shards))
+
+    @classmethod
+    def load(
+        cls,
+        dim: int,
+        num_shards: int = FAISS_NUM_SHARDS,
+        index_path: Path = FAISS_INDEX_PATH,
+        store_path: Path = CHUNK_STORE_PATH,
+        wal_path: Optional[Path] = FAISS_WAL_PATH,
+        partition: str = FAISS_SHARD_PARTITION,
+        mmap: bool = False,
+        vector_path: Optional[Path] = FAISS_VECTORS_PATH
+    ):
+        """
+        Load (or create) num_shards shards, in parallel. Shard files are named
+        after the single-index paths with a `.shard<i>` infix.
+
+        Returns:
+            ShardedFaissIndex over the loaded shards
+        """
+        def load_shard(i: int) -> FaissIndex:
+            return FaissIndex.load(
+                dim,
+                index_path=shard_path(index_path, i),
+                store_path=shard_path(store_path, i),
+                legacy_meta_path=None,
+                wal_path=shard_path(wal_path, i) if wal_path is not None else None,
+                mmap=mmap,
+                id_base=i << SHARD_ID_SHIFT,
+                vector_path=shard_path(vector_path, i) if vector_path is not None else None
+            )
+
+        with ThreadPoolExecutor(max_workers=num_shards) as pool:
+            shards = list(pool.map(load_shard, range(num_shards)))
+        return cls(shards, partition=partition)
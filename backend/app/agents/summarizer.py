@@ -1,24 +1,112 @@
-from transformers import pipeline
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from transformers import pipeline, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
 import nltk
 nltk.download('punkt', quiet=True)
 from nltk.tokenize import sent_tokenize
-from typing import List, Dict, Any
-from .config import SUMMARIZER_MODEL
+from typing import List, Dict, Any, Iterator, Optional
+from .config import (
+    SUMMARIZER_MODEL, SUMMARIZER_BATCH_SIZE, SUMMARIZER_MAX_INPUT_TOKENS, SUMMARIZER_WORKERS,
+    SUMMARIZER_FAST_MODE, SUMMARIZER_FAST_NUM_BEAMS, SUMMARIZER_FAST_OUTPUT_RATIO,
+    SUMMARY_CACHE_ENABLED, SUMMARY_CACHE_PATH, SUMMARY_CACHE_MAX_ENTRIES
+)
+from .summary_cache import SummaryCache, cache_key
+from .extractive import top_sentences
 
-# Initialize Hugging Face summarization pipeline with proper configuration
-try:
-    _summarizer = pipeline(
+
+def load_summarizer(fast: bool = SUMMARIZER_FAST_MODE):
+    """
+    Build the Hugging Face summarization pipeline. In fast mode the model's
+    Linear layers are dynamically quantized to int8 for CPU inference.
+    """
+    pipe = pipeline(
         "summarization",
         model=SUMMARIZER_MODEL,
         tokenizer=SUMMARIZER_MODEL,
         device=-1  # CPU; set 0 for GPU
     )
-    print(f"Summarization pipeline initialized with model: {SUMMARIZER_MODEL}")
+    if fast:
+        import torch
+        pipe.model = torch.ao.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        pipe.model.config.use_cache = True
+    return pipe
+
+
+def generation_kwargs(
+    max_length: int,
+    min_length: int,
+    input_tokens: int = 0,
+    fast: bool = SUMMARIZER_FAST_MODE
+) -> Dict[str, Any]:
+    """
+    Generation settings for one pipeline call. The default mode keeps the
+    model's own decoding config; fast mode decodes greedily (or with a small
+    beam) and caps new tokens at a share of the longest input's length.
+
+    Args:
+        max_length: Maximum length of the summary
+        min_length: Minimum length of the summary
+        input_tokens: Token length of the longest input in the call
+        fast: Use fast decoding settings
+    """
+    if not fast:
+        return {"max_length": max_length, "min_length": min_length}
+    budget = max(8, min(max_length, int(input_tokens * SUMMARIZER_FAST_OUTPUT_RATIO)))
+    return {
+        "max_new_tokens": budget,
+        "min_length": min(min_length, budget // 2),
+        "num_beams": SUMMARIZER_FAST_NUM_BEAMS,
+        "do_sample": False,
+        "use_cache": True,
+    }
+
+
+# Decoding settings are part of every cache key: fast and default outputs differ
+_DECODING = f"fast-int8-beams{SUMMARIZER_FAST_NUM_BEAMS}" if SUMMARIZER_FAST_MODE else "default"
+
+# Initialize Hugging Face summarization pipeline with proper configuration
+try:
+    _summarizer = load_summarizer()
+    print(f"Summarization pipeline initialized with model: {SUMMARIZER_MODEL}"
+          f"{' (fast int8 mode)' if SUMMARIZER_FAST_MODE else ''}")
 except Exception as e:
     print(f"Failed to initialize summarization pipeline: {e}")
     print("Falling back to extractive summarization only")
     _summarizer = None
 
+# Content-addressed cache shared by ingest and query summarization
+summary_cache = None
+if SUMMARY_CACHE_ENABLED:
+    try:
+        summary_cache = SummaryCache(SUMMARY_CACHE_PATH, max_entries=SUMMARY_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        print(f"Summary cache unavailable, summarizing without it: {e}")
+
+
+def extractive_filter_many(texts: List[str], top_k: int = 6) -> List[str]:
+    """
+    Extractive summaries of many texts, scored together in one vectorized
+    pass. Each text keeps its top_k sentences weighted by word frequency.
+
+    Args:
+        texts: Input texts (e.g. all chunks of a document)
+        top_k: Number of sentences to keep per text
+
+    Returns:
+        Extractive summary text per input
+    """
+    sentence_lists = [sent_tokenize(text) for text in texts]
+    long = [i for i, sents in enumerate(sentence_lists) if len(sents) > top_k]
+    results = list(texts)
+    selected = top_sentences(
+        [sentence_lists[i] for i in long], [texts[i] for i in long],
+        top_k=top_k, length_divisor=50
+    )
+    for i, sents in zip(long, selected):
+        results[i] = " ".join(sents)
+    return results
+
 
 def extractive_filter(text: str, top_k: int = 6) -> str:
     """
@@ -32,23 +120,298 @@ def extractive_filter(text: str, top_k: int = 6) -> str:
     Returns:
         Extractive summary text
     """
-    sents = sent_tokenize(text)
-    if len(sents) <= top_k:
-        return text
+    return extractive_filter_many([text], top_k=top_k)[0]
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Ends generation once the event is set (deadline passed or client gone)."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.event.is_set()
+
+
+def _stop_kwargs(stop: Optional[threading.Event]) -> Dict[str, Any]:
+    """Extra pipeline/generate arguments that end generation once `stop` is set."""
+    return {"stopping_criteria": StoppingCriteriaList([_StopOnEvent(stop)])} if stop is not None else {}
+
+
+def _summary_from_output(result) -> str:
+    """Summary text from one pipeline output item, or "" if malformed."""
+    if isinstance(result, list) and len(result) > 0:
+        result = result[0]
+    if isinstance(result, dict) and "summary_text" in result:
+        summary = result["summary_text"]
+        if summary and summary.strip():
+            return summary.strip()
+    return ""
+
+
+def _input_tokens(texts: List[str]) -> int:
+    """Longest input in tokens (only needed to size fast-mode generation)."""
+    if not SUMMARIZER_FAST_MODE:
+        return 0
+    return min(max(count_tokens(t) for t in texts), input_token_budget())
+
+
+def _chunk_key(text: str, max_length: int, min_length: int) -> str:
+    return cache_key("chunk", text, model=SUMMARIZER_MODEL, decoding=_DECODING,
+                     max_length=max_length, min_length=min_length)
+
+
+def _summarize_one(text: str, max_length: int, min_length: int, stop: Optional[threading.Event] = None) -> str:
+    """Single pipeline call; "" if it fails."""
+    try:
+        out = _summarizer(text, truncation=True,
+                          **generation_kwargs(max_length, min_length, _input_tokens([text])), **_stop_kwargs(stop))
+        return _summary_from_output(out[0] if isinstance(out, list) and out else out)
+    except Exception:
+        return ""
+
+
+def input_token_budget() -> int:
+    """
+    Tokens one summarization input may hold: SUMMARIZER_MAX_INPUT_TOKENS, or
+    the tokenizer's model_max_length, less room for the task prefix.
+    """
+    limit = SUMMARIZER_MAX_INPUT_TOKENS
+    if limit is None:
+        limit = getattr(getattr(_summarizer, "tokenizer", None), "model_max_length", 512)
+        if not limit or limit > 100000:  # tokenizers without a limit report a huge sentinel
+            limit = 512
+    return max(32, limit - 16)
 
-    freq = {}
-    for w in text.lower().split():
-        if len(w) > 3:
-            freq[w] = freq.get(w, 0) + 1
 
-    scores = []
-    for s in sents:
-        score = sum(freq.get(w.lower(), 0) for w in s.split()) + len(s) / 50
-        scores.append((score, s))
+def count_tokens(text: str) -> int:
+    """Summarizer tokenizer length of text (whitespace words without a model)."""
+    tokenizer = getattr(_summarizer, "tokenizer", None)
+    if tokenizer is None:
+        return len(text.split())
+    return len(tokenizer.encode(text, add_special_tokens=False))
 
-    scores.sort(reverse=True)
-    top_sentences = [s for _, s in scores[:top_k]]
-    return " ".join(top_sentences)
+
+def summarize_parallel(
+    texts: List[str],
+    max_length: int = 160,
+    min_length: int = 40,
+    workers: int = SUMMARIZER_WORKERS,
+    batch_size: int = SUMMARIZER_BATCH_SIZE,
+    fallbacks: Optional[List[int]] = None,
+    stop: Optional[threading.Event] = None
+) -> List[str]:
+    """
+    abstractive_summarize_batch split across worker threads (the model
+    releases the GIL while generating). Summaries align with texts;
+    `fallbacks` and `stop` work as in abstractive_summarize_batch.
+    """
+    def run(offset: int, part: List[str]) -> List[str]:
+        failed: List[int] = []
+        out = abstractive_summarize_batch(part, max_length=max_length, min_length=min_length,
+                                          batch_size=batch_size, fallbacks=failed, stop=stop)
+        if fallbacks is not None:
+            fallbacks.extend(offset + i for i in failed)
+        return out
+
+    if workers <= 1 or len(texts) <= batch_size:
+        return run(0, texts)
+    # Contiguous slices, so concatenating the workers' results keeps input order
+    size = -(-len(texts) // workers)
+    starts = list(range(0, len(texts), size))
+    with ThreadPoolExecutor(max_workers=len(starts)) as pool:
+        return [summary for part in pool.map(lambda i: run(i, texts[i:i + size]), starts) for summary in part]
+
+
+def _token_groups(texts: List[str], budget: int) -> List[List[str]]:
+    """Consecutive texts packed into groups of at most budget tokens (an oversized text stands alone)."""
+    groups: List[List[str]] = []
+    used = 0
+    for text in texts:
+        n = count_tokens(text) + 1
+        if groups and used + n <= budget:
+            groups[-1].append(text)
+            used += n
+        else:
+            groups.append([text])
+            used = n
+    return groups
+
+
+def reduce_summaries(
+    summaries: List[str],
+    max_length: int = 300,
+    min_length: int = 100,
+    workers: int = SUMMARIZER_WORKERS,
+    fallbacks: Optional[List[int]] = None,
+    stop: Optional[threading.Event] = None
+) -> str:
+    """
+    Tree-reduce summaries into one. Each level packs consecutive summaries
+    into groups that fit the model's input token budget and summarizes the
+    groups in parallel; levels repeat until a single group remains, which
+    is summarized with the final lengths. Nothing is cut off before the
+    model sees it, and depth grows with the log of the document length.
+
+    Args:
+        summaries: Summaries in document order
+        max_length: Maximum length of the final summary
+        min_length: Minimum length of the final summary
+        fallbacks: Optional list that receives 0 if any step used the
+            extractive fallback instead of the model
+        stop: Optional event that cuts generation short once set
+
+    Returns:
+        Document-level summary
+    """
+    level = [s for s in summaries if s and s.strip()]
+    if not level:
+        return ""
+    budget = input_token_budget()
+    # Intermediate summaries are short enough that several fit one input
+    level_max = min(max_length, max(16, budget // 4))
+    level_min = min(min_length, level_max // 2)
+    failed: List[int] = []
+    groups = _token_groups(level, budget)
+    while len(groups) > 1:
+        merged = summarize_parallel([" ".join(g) for g in groups], level_max, level_min, workers,
+                                    fallbacks=failed, stop=stop)
+        next_groups = _token_groups(merged, budget)
+        if len(next_groups) >= len(groups):
+            # No reduction (e.g. every input already at the budget); finish on the concatenation
+            groups = [merged]
+            break
+        groups = next_groups
+    final = abstractive_summarize_batch([" ".join(groups[0])], max_length=max_length, min_length=min_length,
+                                        fallbacks=failed, stop=stop)[0]
+    if failed and fallbacks is not None:
+        fallbacks.append(0)
+    return final
+
+
+def reduce_summaries_many(
+    summary_lists: List[List[str]],
+    max_length: int = 300,
+    min_length: int = 100,
+    workers: int = SUMMARIZER_WORKERS,
+    stop: Optional[threading.Event] = None
+) -> List[str]:
+    """
+    reduce_summaries over several independent lists. Lists that already
+    fit one model input (the usual case for a few query hits) are finished
+    together in one batched call; longer ones are tree-reduced one by one.
+
+    Returns:
+        One summary per list ("" for lists without content)
+    """
+    results = [""] * len(summary_lists)
+    single, texts = [], []
+    budget = input_token_budget()
+    for i, summaries in enumerate(summary_lists):
+        level = [s for s in summaries if s and s.strip()]
+        if not level:
+            continue
+        groups = _token_groups(level, budget)
+        if len(groups) == 1:
+            single.append(i)
+            texts.append(" ".join(groups[0]))
+        else:
+            results[i] = reduce_summaries(level, max_length, min_length, workers, stop=stop)
+    for i, summary in zip(single, abstractive_summarize_batch(texts, max_length=max_length, min_length=min_length,
+                                                              stop=stop)):
+        results[i] = summary
+    return results
+
+
+def abstractive_summarize_batch(
+    texts: List[str],
+    max_length: int = 160,
+    min_length: int = 40,
+    batch_size: int = SUMMARIZER_BATCH_SIZE,
+    fallbacks: Optional[List[int]] = None,
+    stop: Optional[threading.Event] = None
+) -> List[str]:
+    """
+    Abstractive summaries for many texts. Inputs are sorted by length and
+    sent through the pipeline in padded batches of batch_size, so similar
+    lengths share a batch and little padding is generated. If a batch
+    fails, its items are retried one by one.
+
+    Args:
+        texts: Input texts
+        max_length: Maximum length of each summary
+        min_length: Minimum length of each summary
+        batch_size: Number of texts per generation call
+        fallbacks: Optional list that receives the positions whose summary
+            is the extractive fallback because generation failed
+        stop: Optional event; once set, running generation ends after the
+            current token and remaining batches fall back to extractive
+            summaries. Cut-short outputs count as fallbacks and are not cached.
+
+    Returns:
+        Summaries aligned with texts
+    """
+    results: List[str] = [""] * len(texts)
+    pending = []  # (position, model input)
+    for i, text in enumerate(texts):
+        if not text.strip():
+            continue
+        # If summarizer pipeline is not available, use extractive summarization
+        if _summarizer is None:
+            results[i] = extractive_filter(text, top_k=3)
+            continue
+        # Ensure text is long enough for summarization
+        if len(text.strip()) < 30:
+            results[i] = extractive_filter(text, top_k=2)
+            continue
+        pending.append((i, text))
+
+    if summary_cache is not None and pending:
+        keys = [
+            _chunk_key(text, max_length, min_length)
+            for _, text in pending
+        ]
+        cached = summary_cache.get_many(keys)
+        for (i, _), hit in zip(pending, cached):
+            if hit is not None:
+                results[i] = hit
+        pending = [item for item, hit in zip(pending, cached) if hit is None]
+
+    fresh: Dict[str, str] = {}
+    pending.sort(key=lambda item: len(item[1]))
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        inputs = [text for _, text in batch]
+        if stop is not None and stop.is_set():
+            summaries = [""] * len(inputs)
+        else:
+            try:
+                out = _summarizer(inputs, batch_size=len(inputs), truncation=True,
+                                  **generation_kwargs(max_length, min_length, _input_tokens(inputs)),
+                                  **_stop_kwargs(stop))
+                if not isinstance(out, list) or len(out) != len(inputs):
+                    raise ValueError("unexpected pipeline output")
+                summaries = [_summary_from_output(item) for item in out]
+            except Exception as e:
+                print(f"Batched summarization failed, retrying {len(batch)} items individually: {e}")
+                summaries = [_summarize_one(text, max_length, min_length, stop) for text in inputs]
+        cut_short = stop is not None and stop.is_set()
+        for (i, text), summary in zip(batch, summaries):
+            if summary and not cut_short:
+                results[i] = summary
+                fresh[_chunk_key(text, max_length, min_length)] = summary
+            elif summary:
+                results[i] = summary
+                if fallbacks is not None:
+                    fallbacks.append(i)
+            else:
+                results[i] = extractive_filter(text, top_k=3)
+                if fallbacks is not None:
+                    fallbacks.append(i)
+
+    if summary_cache is not None and fresh:
+        summary_cache.put_many(fresh)
+    return results
 
 
 def abstractive_summarize(text: str, max_length: int = 160, min_length: int = 40) -> str:
@@ -63,52 +426,81 @@ def abstractive_summarize(text: str, max_length: int = 160, min_length: int = 40
     Returns:
         Abstractive summary string
     """
-    if not text.strip():
-        return ""
-    
-    # If summarizer pipeline is not available, use extractive summarization
+    return abstractive_summarize_batch([text], max_length=max_length, min_length=min_length)[0]
+
+
+def stream_summary(
+    text: str,
+    max_length: int = 160,
+    min_length: int = 40,
+    stop: Optional[threading.Event] = None
+) -> Iterator[str]:
+    """
+    Abstractive summary of text, yielded piece by piece as the model
+    generates it. Generation runs on a background thread feeding a text
+    streamer. Streamers do not support beam search, so decoding is greedy.
+
+    Args:
+        text: Input text
+        max_length: Maximum length of summary
+        min_length: Minimum length of summary
+        stop: Optional event; once set, generation ends after the current token
+
+    Returns:
+        Iterator over decoded text pieces
+    """
     if _summarizer is None:
-        return extractive_filter(text, top_k=3)
-    
+        raise RuntimeError("Summarization pipeline is not available")
+    model, tokenizer = _summarizer.model, _summarizer.tokenizer
+    params = (getattr(model.config, "task_specific_params", None) or {}).get("summarization", {})
+    # input_token_budget leaves room for the task prefix added here
+    inputs = tokenizer(params.get("prefix", "") + text, return_tensors="pt",
+                       truncation=True, max_length=input_token_budget() + 16)
+    kwargs = generation_kwargs(max_length, min_length, min(inputs["input_ids"].shape[1], input_token_budget()))
+    kwargs["num_beams"] = 1
+    if "no_repeat_ngram_size" in params:
+        kwargs["no_repeat_ngram_size"] = params["no_repeat_ngram_size"]
+
+    stop = stop or threading.Event()
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+
+    def generate():
+        try:
+            model.generate(**inputs, streamer=streamer,
+                           stopping_criteria=StoppingCriteriaList([_StopOnEvent(stop)]), **kwargs)
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    threading.Thread(target=generate, name="summary-stream", daemon=True).start()
     try:
-        # Ensure text is not too long for the model (T5-small has token limits)
-        if len(text) > 512:  # T5-small token limit
-            text = text[:512]
-        
-        # Ensure text is long enough for summarization
-        if len(text.strip()) < 30:
-            return extractive_filter(text, top_k=2)
-        
-        # Call the pipeline with minimal parameters to avoid issues
-        out = _summarizer(text, max_length=max_length, min_length=min_length)
-        
-        # The pipeline should always return a list with at least one dict
-        if isinstance(out, list) and len(out) > 0:
-            result = out[0]
-            if isinstance(result, dict) and "summary_text" in result:
-                summary = result["summary_text"]
-                if summary and summary.strip():
-                    return summary.strip()
-        
-        # If we get here, something went wrong with the pipeline
-        return extractive_filter(text, top_k=3)
-            
-    except Exception as e:
-        # Fallback to extractive summarization
-        return extractive_filter(text, top_k=3)
+        for piece in streamer:
+            if piece:
+                yield piece
+    finally:
+        # Also reached when the consumer stops early: let the generator thread finish
+        stop.set()
+    if errors:
+        raise errors[0]
 
 
 def chunk_and_summarize_chunks(
     chunks: List[Dict[str, Any]],
-    per_chunk_max: int = 120
+    per_chunk_max: int = 120,
+    batch_size: int = SUMMARIZER_BATCH_SIZE,
+    stop: Optional[threading.Event] = None
 ) -> Dict[str, Any]:
     """
     Summarizes each chunk extractively and then abstractively,
-    then merges all summaries into a final document-level summary.
+    then tree-reduces all summaries into a final document-level summary.
 
     Args:
         chunks: List of dicts with keys 'text' and optional 'page'
         per_chunk_max: Max length for per-chunk abstractive summary
+        batch_size: Chunks per summarization pipeline call
+        stop: Optional event that cuts generation short once set (the
+            pack is then built from fallbacks and not cached)
 
     Returns:
         Dict containing:
@@ -120,6 +512,17 @@ def chunk_and_summarize_chunks(
             "per_chunk": [],
             "final_summary": "No content available for summarization."
         }
+
+    doc_key = None
+    if summary_cache is not None and _summarizer is not None:
+        doc_key = cache_key(
+            "document",
+            json.dumps([[c.get("page"), c.get("text", "")] for c in chunks]),
+            model=SUMMARIZER_MODEL, decoding=_DECODING, per_chunk_max=per_chunk_max
+        )
+        pack = summary_cache.get(doc_key)
+        if pack is not None:
+            return pack
     
     summaries = []
     for c in chunks:
@@ -127,21 +530,26 @@ def chunk_and_summarize_chunks(
         if not text or not text.strip():
             continue
             
+        # Fallback summary for this chunk, replaced once the batch is summarized
+        summaries.append({
+            "page": c.get("page"),
+            "summary": text[:200] + "..." if len(text) > 200 else text,
+            "orig": text
+        })
+
+    # Set when any summary is a truncation/extractive fallback; such packs are not cached
+    fallbacks: List[int] = []
+    if summaries:
         try:
-            filtered = extractive_filter(text, top_k=6)
-            brief = abstractive_summarize(filtered, max_length=per_chunk_max)
-            summaries.append({
-                "page": c.get("page"),
-                "summary": brief,
-                "orig": text
-            })
+            # Extractive pass over the whole document at once, then batched abstractive
+            filtered = extractive_filter_many([s["orig"] for s in summaries], top_k=6)
+            briefs = summarize_parallel(filtered, max_length=per_chunk_max, batch_size=batch_size,
+                                        fallbacks=fallbacks, stop=stop)
+            for summary, brief in zip(summaries, briefs):
+                summary["summary"] = brief
         except Exception as e:
-            # Add a fallback summary for this chunk
-            summaries.append({
-                "page": c.get("page"),
-                "summary": text[:200] + "..." if len(text) > 200 else text,
-                "orig": text
-            })
+            print(f"Per-chunk summarization failed, keeping truncated chunks: {e}")
+            fallbacks.append(-1)
 
     if not summaries:
         return {
@@ -150,20 +558,26 @@ def chunk_and_summarize_chunks(
         }
 
     try:
-        merged_text = " ".join(s["summary"] for s in summaries if s["summary"])
-        if not merged_text.strip():
-            merged_text = " ".join(s["orig"] for s in summaries if s["orig"])
+        parts = [s["summary"] for s in summaries if s["summary"]]
+        if not " ".join(parts).strip():
+            parts = [s["orig"] for s in summaries if s["orig"]]
+        merged_text = " ".join(parts)
         
-        final_summary = abstractive_summarize(merged_text, max_length=300, min_length=100)
+        final_summary = reduce_summaries(parts, max_length=300, min_length=100, fallbacks=fallbacks, stop=stop)
         
         # Ensure we have a valid final summary
         if not final_summary or not final_summary.strip():
             final_summary = merged_text[:500] + "..." if len(merged_text) > 500 else merged_text
+            fallbacks.append(-1)
             
     except Exception as e:
         final_summary = "Summary generation failed, but content is available."
+        fallbacks.append(-1)
 
-    return {
+    pack = {
         "per_chunk": summaries,
         "final_summary": final_summary
     }
+    if doc_key is not None and not fallbacks:
+        summary_cache.put(doc_key, pack)
+    return pack
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def cache_key(kind: str, text: str, **params: Any) -> str:
+    """
+    Content address for a summary: sha256 over the kind of summary, its
+    parameters (model, lengths, ...) and the input text.
+    """
+    h = hashlib.sha256()
+    h.update(kind.encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class SummaryCache:
+    """
+    On-disk LRU cache of summarizer outputs in SQLite. Values are JSON;
+    entries beyond max_entries are evicted least recently used first.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 50000):
+        """
+        Args:
+            path: SQLite file to use. None keeps the cache in memory.
+            max_entries: Capacity before LRU eviction
+        """
+        self.path: Optional[Path] = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path) if self.path is not None else ":memory:",
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        """Cached values aligned with keys (None for misses); refreshes recency of hits."""
+        if not keys:
+            return []
+        found: Dict[str, Any] = {}
+        with self._lock:
+            unique = list(set(keys))
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM summaries WHERE key IN ({','.join('?' * len(part))})",
+                    part
+                ).fetchall()
+                found.update((k, json.loads(v)) for k, v in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE summaries SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+                self._conn.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return [found.get(k) for k in keys]
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key])[0]
+
+    def put_many(self, items: Dict[str, Any]):
+        """Store values by key, then evict the least recently used beyond capacity."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, value, last_used) VALUES (?, ?, ?)",
+                [(k, json.dumps(v), now) for k, v in items.items()]
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM summaries WHERE key IN "
+                    "(SELECT key FROM summaries ORDER BY last_used ASC LIMIT ?)",
+                    (excess,)
+                )
+            self._conn.commit()
+
+    def put(self, key: str, value: Any):
+        self.put_many({key: value})
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM summaries")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
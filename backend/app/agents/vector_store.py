@@ -0,0 +1,136 @@
+import os
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Sequence
+
+# Fixed-size .npy header so the row count can be rewritten in place as the
+# file grows. 128 bytes keeps the data 64-byte aligned.
+_HEADER_LEN = 128
+_PREFIX = np.lib.format.magic(1, 0)
+
+
+class VectorStore:
+    """
+    Append-only store of record for raw embeddings: a regular `.npy` file
+    (float32 or float16) whose row r holds the vector with id `id_base + r`.
+    Reads go through a read-only memory map, so rebuilding an index from it
+    never re-runs the embedding model and never copies the whole file into
+    the heap. Ids that were never written (gaps) are zero rows.
+    """
+
+    def __init__(self, path: Path, dim: int, dtype: str = "float32", id_base: int = 0, read_only: bool = False):
+        """
+        Args:
+            path: .npy file path
+            dim: Vector dimension
+            dtype: Storage dtype for a new file ("float32" or "float16")
+            id_base: Vector id stored in row 0
+            read_only: Open without write access (mmap serving mode)
+        """
+        self.path = Path(path)
+        self.dim = dim
+        self.id_base = id_base
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._map = None
+        if self.path.exists():
+            self._read_header()
+            if self.dim != dim:
+                raise ValueError(f"{self.path} holds {self.dim}-d vectors, expected {dim}")
+        else:
+            if read_only:
+                raise FileNotFoundError(self.path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.dtype = np.dtype(dtype)
+            self.count = 0
+            with open(self.path, "wb") as f:
+                f.write(self._header())
+        self._file = None if read_only else open(self.path, "r+b")
+
+    def _header(self) -> bytes:
+        header = {
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.count, self.dim),
+        }
+        text = repr(header).encode("latin1")
+        body_len = _HEADER_LEN - len(_PREFIX) - 2
+        text = text + b" " * (body_len - len(text) - 1) + b"\n"
+        return _PREFIX + np.uint16(body_len).tobytes() + text
+
+    def _read_header(self):
+        with open(self.path, "rb") as f:
+            np.lib.format.read_magic(f)
+            shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+        self.count, self.dim = shape
+        self.dtype = dtype
+        self._map = None
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        """Number of rows (highest stored id - id_base + 1)."""
+        return self.count
+
+    def append(self, ids: Sequence[int], vectors: np.ndarray):
+        """
+        Write vectors for ids at or beyond the current end of the store;
+        ids already stored are skipped. Ids must be increasing.
+        """
+        if self.read_only:
+            raise RuntimeError(f"{self.path} was opened read-only")
+        rows = np.asarray(ids, dtype='int64') - self.id_base
+        vectors = np.asarray(vectors)
+        keep = rows >= self.count
+        if not keep.any():
+            return
+        rows, vectors = rows[keep], vectors[keep]
+        with self._lock:
+            out = np.zeros((int(rows[-1]) + 1 - self.count, self.dim), dtype=self.dtype)
+            out[rows - self.count] = vectors
+            self._file.seek(_HEADER_LEN + self.count * self._row_bytes)
+            self._file.write(out.tobytes())
+            self.count += len(out)
+            # Header last: a crash before it leaves the old row count valid
+            self._file.seek(0)
+            self._file.write(self._header())
+            self._file.flush()
+            self._map = None
+
+    def get(self, ids: Sequence[int]) -> np.ndarray:
+        """Vectors for the given ids as float32, shape (len(ids), dim)."""
+        rows = np.asarray(ids, dtype='int64') - self.id_base
+        if len(rows) == 0:
+            return np.zeros((0, self.dim), dtype='float32')
+        with self._lock:
+            if len(rows) and rows.max() >= self.count and self.read_only:
+                self._read_header()  # another process may have appended since
+            if len(rows) and (rows.min() < 0 or rows.max() >= self.count):
+                raise KeyError(f"vector ids outside {self.path}")
+            if self._map is None:
+                self._map = np.memmap(self.path, dtype=self.dtype, mode="r",
+                                      offset=_HEADER_LEN, shape=(self.count, self.dim))
+            return np.asarray(self._map[rows], dtype='float32')
+
+    def covers(self, ids: Sequence[int]) -> bool:
+        """True if every id has a row in the store."""
+        rows = np.asarray(ids, dtype='int64') - self.id_base
+        if len(rows) and rows.max() >= self.count and self.read_only:
+            with self._lock:
+                self._read_header()
+        return bool(len(rows) == 0 or (rows.min() >= 0 and rows.max() < self.count))
+
+    def sync(self):
+        """Flush appended rows to stable storage."""
+        if self._file is not None:
+            with self._lock:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._map = None
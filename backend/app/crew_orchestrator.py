@@ -1,12 +1,19 @@
 import os
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
 import numpy as np
 from .agents import (
     ReaderAgent, ChunkingAgent, EmbeddingAgent, FAISSAgent,
     SummarizerAgent, FlashcardAgent, QAAgent, AgentResult
 )
 from .agents.embeddings import EmbeddingService
-from .agents.config import USE_CREW_SDK
+from .agents.config import (
+    USE_CREW_SDK, FAISS_MMAP_LOAD, FAISS_NUM_SHARDS, KEYWORD_INDEX_PATH, QA_RETRIEVAL_MODE,
+    QA_ANSWER_MODE, QA_FUSE_SUMMARIES, QA_DEFAULT_BUDGET_MS,
+    INGEST_BACKGROUND_JOBS, JOB_WORKERS, JOB_HISTORY_MAX, FLASHCARD_STORE_PATH
+)
+from .agents.flashcard_store import FlashcardStore
+from .jobs import JobManager
 
 
 class CrewAdapter:
@@ -42,19 +49,27 @@ class CrewOrchestrator:
         sample_emb = self.embedding_agent.service.embed(["hello"])
         self.dim = sample_emb.shape[1]
 
-        # Try to load existing FAISS index, create new one if it doesn't exist
+        # Load the FAISS index; missing files give an empty persistent index
         try:
-            from .agents.faiss_index import FaissIndex
-            loaded_index = FaissIndex.load(dim=self.dim)
+            if FAISS_NUM_SHARDS > 1:
+                from .agents.sharded_index import ShardedFaissIndex
+                loaded_index = ShardedFaissIndex.load(dim=self.dim, num_shards=FAISS_NUM_SHARDS, mmap=FAISS_MMAP_LOAD)
+            else:
+                from .agents.faiss_index import FaissIndex
+                loaded_index = FaissIndex.load(dim=self.dim, mmap=FAISS_MMAP_LOAD)
             self.faiss_agent = FAISSAgent(dim=self.dim)
             self.faiss_agent.idx = loaded_index
-            print(f"Loaded existing FAISS index with {len(self.faiss_agent.idx.metadb)} entries")
+            from .agents.keyword_index import KeywordIndex
+            self.faiss_agent.attach_keyword_index(KeywordIndex(KEYWORD_INDEX_PATH))
+            print(f"Loaded existing FAISS index with {len(self.faiss_agent.idx)} entries")
         except Exception as e:
+            # No in-memory fallback: its chunk metadata would never be persisted,
+            # while saving it would overwrite the snapshot on disk
             print(f"Could not load existing FAISS index: {e}")
-            print("Creating new empty FAISS index")
-            self.faiss_agent = FAISSAgent(dim=self.dim)
+            raise
         self.summarizer = SummarizerAgent()
         self.flashcard = FlashcardAgent()
+        self.flashcard_store = FlashcardStore(FLASHCARD_STORE_PATH)
         self.qa_agent = QAAgent(
             embedding_service=self.embedding_agent.service,
             faiss_agent=self.faiss_agent,
@@ -62,6 +77,8 @@ class CrewOrchestrator:
         )
 
         self.trace: List[Dict[str, Any]] = []  # Logs for explainability
+        self._trace_lock = threading.Lock()  # background jobs append to the trace too
+        self.jobs = JobManager(max_workers=JOB_WORKERS, history=JOB_HISTORY_MAX)
         self.crew_adapter = CrewAdapter() if use_crew_sdk else None
 
     def run_ingest_pipeline(
@@ -69,7 +86,8 @@ class CrewOrchestrator:
         file_path: str,
         pdf_id: Optional[str] = None,
         pre_summarize: bool = True,
-        generate_flashcards: bool = True
+        generate_flashcards: bool = True,
+        background: bool = INGEST_BACKGROUND_JOBS
     ) -> Dict[str, Any]:
         """
         Full ingest pipeline:
@@ -78,7 +96,11 @@ class CrewOrchestrator:
         3) Embeds chunks
         4) Adds to FAISS index
         5) Optionally pre-summarizes
-        6) Optionally generates flashcards
+        6) Optionally generates flashcards from all chunks
+
+        With background=True, steps 5-6 are queued as a job and the call
+        returns as soon as the document is searchable; poll `job_id` via
+        `job_status`.
         """
 
         # Step 1: Read PDF
@@ -100,44 +122,225 @@ class CrewOrchestrator:
         metas = r3.payload["metas"]
         self._trace_add(r3)
 
-        # Step 4: Add embeddings to FAISS
-        r4 = self.faiss_agent.add(vectors, metas)
+        # Step 4: Add embeddings to FAISS (replacing any earlier version of this PDF)
+        if pdf_id is not None:
+            r4 = self.faiss_agent.upsert(pdf_id, vectors, metas)
+        else:
+            r4 = self.faiss_agent.add(vectors, metas)
         self._trace_add(r4)
 
+        ids = r4.payload["ids"]
+        if background and (pre_summarize or generate_flashcards):
+            job_id = self.jobs.submit(
+                "summarize", self._summarize_and_flashcards, chunks, pre_summarize, generate_flashcards, ids,
+                pdf_id=pdf_id
+            )
+            return {
+                "trace": self.trace,
+                "summary_pack": None,
+                "flashcards": [],
+                "num_chunks": len(chunks),
+                "job_id": job_id
+            }
+
+        summary_pack, flashcards = self._summarize_and_flashcards(
+            lambda stage: None, chunks, pre_summarize, generate_flashcards, ids
+        )
+        return {
+            "trace": self.trace,
+            "summary_pack": summary_pack,
+            "flashcards": flashcards,
+            "num_chunks": len(chunks)
+        }
+
+    def _summarize_and_flashcards(
+        self,
+        progress,
+        chunks: List[Dict[str, Any]],
+        pre_summarize: bool,
+        generate_flashcards: bool,
+        ids: Optional[List[int]] = None
+    ):
+        """
+        Ingest steps 5-6, run inline or as a background job. Per-chunk
+        summaries are stored with the chunks' vector metadata (`ids`), so
+        queries can answer from them without generating; flashcards go to
+        the flashcard store under the chunks' pdf_id.
+
+        Returns:
+            (summary_pack, flashcards)
+        """
         # Step 5: Optional hierarchical summarization
         summary_pack = None
         if pre_summarize:
+            progress("summarizing")
             r5 = self.summarizer.run(chunks)
             summary_pack = r5.payload.get("summary_pack")
             self._trace_add(r5)
+            if ids and summary_pack:
+                by_text = {s["orig"]: s["summary"] for s in summary_pack.get("per_chunk", []) if s.get("summary")}
+                fields = [{"summary": by_text.get(c.get("text", ""))} for c in chunks]
+                stored = [(vid, f) for vid, f in zip(ids, fields) if f["summary"]]
+                if stored:
+                    self._trace_add(self.faiss_agent.annotate([v for v, _ in stored], [f for _, f in stored]))
 
         # Step 6: Optional flashcard generation
         flashcards: List[Dict[str, Any]] = []
-        if generate_flashcards and summary_pack:
-            r6 = self.flashcard.run(summary_pack["final_summary"])
+        if generate_flashcards:
+            progress("flashcards")
+            r6 = self.flashcard.run_chunks([c.get("text", "") for c in chunks])
             flashcards = r6.payload.get("flashcards", [])
             self._trace_add(r6)
+            pdf_id = chunks[0].get("pdf_id") if chunks else None
+            stored = self.flashcard_store.replace(pdf_id, flashcards)
+            print(f"Stored {stored} flashcards for {pdf_id}")
 
-        return {
-            "trace": self.trace,
-            "summary_pack": summary_pack,
-            "flashcards": flashcards,
-            "num_chunks": len(chunks)
-        }
+        return summary_pack, flashcards
 
-    def run_query(self, query: str, top_k: int = 5) -> Dict[str, Any]:
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status of a background ingest job: queued, running (with its stage),
+        done or failed. A finished job reports the final summary and the
+        number of flashcards; full results are in the trace.
         """
-        Runs a retrieval-augmented QA query over the indexed corpus.
+        job = self.jobs.status(job_id)
+        if job is None:
+            return None
+        result = job.pop("result")
+        if result is not None:
+            summary_pack, flashcards = result
+            job["final_summary"] = summary_pack.get("final_summary") if summary_pack else None
+            job["num_flashcards"] = len(flashcards)
+        return job
+
+    def run_query(
+        self,
+        query: str,
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, List[str]]] = None,
+        mode: str = QA_RETRIEVAL_MODE,
+        answer_mode: str = QA_ANSWER_MODE,
+        fuse: bool = QA_FUSE_SUMMARIES,
+        budget_ms: Optional[float] = QA_DEFAULT_BUDGET_MS
+    ) -> Dict[str, Any]:
+        """
+        Runs a retrieval-augmented QA query over the indexed corpus,
+        optionally restricted to one or more PDFs. `mode` selects semantic,
+        keyword (BM25), hybrid or auto retrieval; `answer_mode` whether the
+        answer is built from stored chunk summaries (optionally fused), from
+        the hit sentences most similar to the query, or summarized at query
+        time. With `budget_ms` the agent degrades to cheaper stages to
+        answer within the budget; `tier` reports the answer step used.
         Returns answer, sources, and trace logs.
         """
-        r = self.qa_agent.run(query, top_k=top_k)
+        r = self.qa_agent.run(
+            query, top_k=top_k, pdf_id=pdf_id, mode=mode, answer_mode=answer_mode, fuse=fuse, budget_ms=budget_ms
+        )
         self._trace_add(r)
         return {
             "answer": r.payload["answer"],
             "sources": r.payload["sources"],
+            "retrieval_mode": r.payload.get("retrieval_mode"),
+            "answer_mode": r.payload.get("answer_mode"),
+            "sentences": r.payload.get("sentences"),
+            "tier": r.payload.get("tier"),
+            "degraded": r.payload.get("degraded", False),
             "trace": self.trace
         }
 
+    def run_queries(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, List[str]]] = None,
+        mode: str = QA_RETRIEVAL_MODE,
+        answer_mode: str = QA_ANSWER_MODE,
+        fuse: bool = QA_FUSE_SUMMARIES
+    ) -> Dict[str, Any]:
+        """
+        Answers many queries with shared settings in one batched pass
+        (one embedding call, one FAISS search, batched answer stage).
+        Returns per-query results in input order, and trace logs.
+        """
+        results = self.qa_agent.run_many(
+            queries, top_k=top_k, pdf_id=pdf_id, mode=mode, answer_mode=answer_mode, fuse=fuse
+        )
+        r = AgentResult(self.qa_agent.name, payload={"num_queries": len(queries)})
+        r.add_log(f"answered {len(queries)} queries in batch")
+        self._trace_add(r)
+        return {
+            "results": [
+                {
+                    "answer": res.payload["answer"],
+                    "sources": res.payload["sources"],
+                    "retrieval_mode": res.payload.get("retrieval_mode"),
+                    "answer_mode": res.payload.get("answer_mode"),
+                    "sentences": res.payload.get("sentences"),
+                    "tier": res.payload.get("tier"),
+                    "degraded": res.payload.get("degraded", False),
+                }
+                for res in results
+            ],
+            "trace": self.trace
+        }
+
+    def stream_query(
+        self,
+        query: str,
+        top_k: int = 5,
+        pdf_id: Optional[Union[str, List[str]]] = None,
+        mode: str = QA_RETRIEVAL_MODE,
+        answer_mode: str = QA_ANSWER_MODE,
+        fuse: bool = QA_FUSE_SUMMARIES,
+        budget_ms: Optional[float] = QA_DEFAULT_BUDGET_MS
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of run_query: yields (event, data) pairs, first the
+        retrieved sources, then answer text pieces as they are generated,
+        then the completed answer (see QAAgent.stream).
+        """
+        for event, data in self.qa_agent.stream(
+            query, top_k=top_k, pdf_id=pdf_id, mode=mode, answer_mode=answer_mode, fuse=fuse, budget_ms=budget_ms
+        ):
+            if event == "done":
+                r = AgentResult(self.qa_agent.name, payload=data)
+                r.add_log(f"streamed answer ({data.get('tier', 'n/a')} tier)")
+                self._trace_add(r)
+            yield event, data
+
+    def answer_cache_stats(self) -> Dict[str, Any]:
+        """
+        Hit-rate metrics of the exact and semantic QA answer caches.
+        """
+        stats: Dict[str, Any] = {"index_version": self.faiss_agent.version}
+        stats["exact"] = dict(self.qa_agent.cache.stats(), enabled=True) if self.qa_agent.cache else {"enabled": False}
+        stats["semantic"] = (
+            dict(self.qa_agent.semantic_cache.stats(), enabled=True)
+            if self.qa_agent.semantic_cache else {"enabled": False}
+        )
+        return stats
+
+    def get_flashcards(self, pdf_id: Optional[str] = None, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """
+        One page of stored flashcards, optionally of one PDF, with the
+        total count for paging.
+        """
+        return {
+            "flashcards": self.flashcard_store.page(pdf_id, offset=offset, limit=limit),
+            "total": self.flashcard_store.count(pdf_id),
+            "offset": offset,
+            "limit": limit
+        }
+
+    def remove_document(self, pdf_id: str) -> Dict[str, Any]:
+        """
+        Removes every indexed chunk of a PDF from the corpus.
+        """
+        r = self.faiss_agent.remove(pdf_id)
+        self._trace_add(r)
+        cards = self.flashcard_store.remove_pdf(pdf_id)
+        return {"pdf_id": pdf_id, "removed": r.payload["num_vectors"], "removed_flashcards": cards}
+
     def _trace_add(self, agent_result: AgentResult):
         """
         Appends agent result to trace logs.
@@ -152,4 +355,5 @@ class CrewOrchestrator:
         if agent_result.agent in ["FlashcardAgent", "SummarizerAgent"]:
             trace_entry["payload"] = agent_result.payload
             
-        self.trace.append(trace_entry)
+        with self._trace_lock:
+            self.trace.append(trace_entry)
@@ -0,0 +1,106 @@
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobManager:
+    """
+    Runs background jobs on a thread pool and keeps their status queryable.
+    A job function receives a `progress(stage)` callback as its first
+    argument to report which step it is on. Finished jobs are kept up to
+    `history` entries, oldest dropped first.
+    """
+
+    def __init__(self, max_workers: int = 2, history: int = 500):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures = {}
+        self._history = history
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, pdf_id: Optional[str] = None, **kwargs) -> str:
+        """
+        Queue fn(progress, *args, **kwargs).
+
+        Returns:
+            Job id
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "pdf_id": pdf_id,
+            "status": "queued",
+            "stage": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._trim()
+            self._futures[job_id] = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job: Dict[str, Any], fn: Callable[..., Any], args, kwargs):
+        def progress(stage: str):
+            with self._lock:
+                job["stage"] = stage
+
+        with self._lock:
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        try:
+            result = fn(progress, *args, **kwargs)
+            with self._lock:
+                job["status"] = "done"
+                job["result"] = result
+        except Exception as e:
+            print(f"Job {job['id']} ({job['kind']}) failed: {e}")
+            traceback.print_exc()
+            with self._lock:
+                job["status"] = "failed"
+                job["error"] = str(e)
+        finally:
+            with self._lock:
+                job["finished_at"] = time.time()
+                self._futures.pop(job["id"], None)
+
+    def _trim(self):
+        """Drop the oldest finished jobs beyond the history limit (caller holds the lock)."""
+        excess = len(self._jobs) - self._history
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]["status"] in ("done", "failed"):
+                del self._jobs[job_id]
+                excess -= 1
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self, pdf_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Snapshots of known jobs, oldest first, optionally filtered."""
+        with self._lock:
+            return [
+                dict(job) for job in self._jobs.values()
+                if (pdf_id is None or job["pdf_id"] == pdf_id) and (status is None or job["status"] == status)
+            ]
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until every queued or running job has finished."""
+        with self._lock:
+            futures = list(self._futures.values())
+        wait(futures, timeout=timeout)
+
+    def shutdown(self, wait_for_jobs: bool = True):
+        self._pool.shutdown(wait=wait_for_jobs)
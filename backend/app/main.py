@@ -1,8 +1,13 @@
+import json
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Union
 from app.crew_orchestrator import CrewOrchestrator
-from app.agents.config import TOP_K_RETRIEVAL
+from app.agents.config import (
+    TOP_K_RETRIEVAL, QA_RETRIEVAL_MODE, QA_ANSWER_MODE, QA_FUSE_SUMMARIES, QA_DEFAULT_BUDGET_MS,
+    QA_BATCH_MAX_QUERIES, FLASHCARD_PAGE_SIZE, FLASHCARD_PAGE_MAX
+)
 import nltk
 nltk.data.path.append(r"C:\Users\rakes\nltk_data")  # <-- your path here
 app = FastAPI(title="Local PDF RAG QA + Flashcards Backend")
@@ -34,10 +39,34 @@ app.add_middleware(
 class QueryRequest(BaseModel):
     query: str
     top_k: int = TOP_K_RETRIEVAL
+    pdf_id: Optional[Union[str, List[str]]] = None  # restrict retrieval to these PDFs
+    mode: str = QA_RETRIEVAL_MODE  # "semantic", "keyword", "hybrid" or "auto"
+    answer_mode: str = QA_ANSWER_MODE  # "summaries", "extractive" or "abstractive"
+    fuse: bool = QA_FUSE_SUMMARIES  # fuse stored summaries into one generated answer
+    budget_ms: Optional[float] = QA_DEFAULT_BUDGET_MS  # latency budget; degrade to cheaper answers to meet it
 
-class QueryResponse(BaseModel):
+class QueryResult(BaseModel):
     answer: str
     sources: List[dict]
+    retrieval_mode: Optional[str] = None
+    answer_mode: Optional[str] = None
+    sentences: Optional[List[dict]] = None  # extractive mode: ranked sentences with source pointers
+    tier: Optional[str] = None  # answer step used: abstractive, fused_summaries, extractive, summaries or truncation
+    degraded: bool = False  # True if cheaper stages were used to meet budget_ms
+
+class QueryResponse(QueryResult):
+    trace: List[dict]
+
+class QueryBatchRequest(BaseModel):
+    queries: List[str]
+    top_k: int = TOP_K_RETRIEVAL
+    pdf_id: Optional[Union[str, List[str]]] = None
+    mode: str = QA_RETRIEVAL_MODE
+    answer_mode: str = QA_ANSWER_MODE
+    fuse: bool = QA_FUSE_SUMMARIES
+
+class QueryBatchResponse(BaseModel):
+    results: List[QueryResult]  # in the order of the request's queries
     trace: List[dict]
 
 
@@ -50,32 +79,149 @@ def root():
     return {"message": "PDF RAG QA backend is running!"}
 
 
+def _validate_options(req):
+    if req.mode not in ("auto", "semantic", "keyword", "hybrid"):
+        raise HTTPException(status_code=400, detail=f"Unknown retrieval mode '{req.mode}'.")
+    if req.answer_mode not in ("summaries", "extractive", "abstractive"):
+        raise HTTPException(status_code=400, detail=f"Unknown answer mode '{req.answer_mode}'.")
+
+
+def _validate_query(req: QueryRequest):
+    if not req.query.strip():
+        raise HTTPException(status_code=400, detail="Query text cannot be empty.")
+
+    _validate_options(req)
+    if req.budget_ms is not None and req.budget_ms <= 0:
+        raise HTTPException(status_code=400, detail="budget_ms must be positive.")
+
+
 @app.post("/query", response_model=QueryResponse)
 def query_rag(req: QueryRequest):
     """
     Query the RAG system over the FAISS index.
     Returns the summarized answer, source chunks, and agent trace.
     """
-    if not req.query.strip():
-        raise HTTPException(status_code=400, detail="Query text cannot be empty.")
-    
-    result = orchestrator.run_query(req.query, top_k=req.top_k)
+    _validate_query(req)
+
+    result = orchestrator.run_query(
+        req.query, top_k=req.top_k, pdf_id=req.pdf_id,
+        mode=req.mode, answer_mode=req.answer_mode, fuse=req.fuse, budget_ms=req.budget_ms
+    )
     
     return QueryResponse(
         answer=result["answer"],
         sources=result["sources"],
+        trace=result["trace"],
+        retrieval_mode=result["retrieval_mode"],
+        answer_mode=result["answer_mode"],
+        sentences=result["sentences"],
+        tier=result["tier"],
+        degraded=result["degraded"]
+    )
+
+
+@app.post("/query/batch", response_model=QueryBatchResponse)
+def query_rag_batch(req: QueryBatchRequest):
+    """
+    Answer many queries with shared settings in one batched pass.
+    Results come back in the order of the queries.
+    """
+    if not req.queries:
+        raise HTTPException(status_code=400, detail="No queries given.")
+    if len(req.queries) > QA_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {QA_BATCH_MAX_QUERIES} queries per batch.")
+    if any(not q.strip() for q in req.queries):
+        raise HTTPException(status_code=400, detail="Query text cannot be empty.")
+    _validate_options(req)
+
+    result = orchestrator.run_queries(
+        req.queries, top_k=req.top_k, pdf_id=req.pdf_id,
+        mode=req.mode, answer_mode=req.answer_mode, fuse=req.fuse
+    )
+    return QueryBatchResponse(
+        results=[QueryResult(**r) for r in result["results"]],
         trace=result["trace"]
     )
 
 
+def _sse(event: str, data: dict) -> str:
+    # numpy scalars in source metadata serialize through .item()
+    payload = json.dumps(data, default=lambda o: o.item() if hasattr(o, "item") else str(o))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@app.post("/query/stream")
+def query_rag_stream(req: QueryRequest):
+    """
+    Streaming variant of /query as Server-Sent Events: a `sources` event
+    as soon as retrieval finishes, `token` events with answer text as it
+    is generated, then a `done` event with the complete answer and the
+    tier it came from.
+    """
+    _validate_query(req)
+
+    events = orchestrator.stream_query(
+        req.query, top_k=req.top_k, pdf_id=req.pdf_id,
+        mode=req.mode, answer_mode=req.answer_mode, fuse=req.fuse, budget_ms=req.budget_ms
+    )
+    return StreamingResponse(
+        (_sse(event, data) for event, data in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Hit-rate metrics of the query-answer cache.
+    """
+    return orchestrator.answer_cache_stats()
+
+
 @app.post("/rebuild_index")
 def rebuild_index():
     """
     Trigger rebuilding the FAISS index from all PDFs in the data directory.
+    Documents are re-ingested through the live orchestrator, so queries
+    see the rebuilt index without a restart. Summaries and flashcards are
+    generated in the background; poll /jobs/{job_id} for each returned id.
     """
     from scripts.build_index import main as build_index
-    build_index()
-    return {"message": "Index rebuild complete!"}
+    result = build_index(orchestrator=orchestrator)
+    return {"message": "Index rebuild complete!", **result}
+
+
+@app.delete("/documents/{pdf_id}")
+def delete_document(pdf_id: str):
+    """
+    Remove a PDF's chunks from the FAISS index.
+    """
+    result = orchestrator.remove_document(pdf_id)
+    if result["removed"] == 0:
+        raise HTTPException(status_code=404, detail=f"No indexed chunks for document '{pdf_id}'.")
+    return result
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Status of a background summarization/flashcard job started by ingestion.
+    """
+    job = orchestrator.job_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+    return job
+
+
+@app.get("/jobs")
+def list_jobs(pdf_id: Optional[str] = None, status: Optional[str] = None):
+    """
+    Background jobs, optionally filtered by document or status
+    (queued, running, done, failed).
+    """
+    jobs = [orchestrator.job_status(j["id"]) for j in orchestrator.jobs.list(pdf_id=pdf_id, status=status)]
+    return {"jobs": [j for j in jobs if j is not None]}
 
 
 @app.post("/summary")
@@ -86,7 +232,7 @@ def get_summary(req: QueryRequest):
     if not req.query.strip():
         raise HTTPException(status_code=400, detail="Query text cannot be empty.")
     
-    result = orchestrator.run_query(req.query, top_k=req.top_k)
+    result = orchestrator.run_query(req.query, top_k=req.top_k, pdf_id=req.pdf_id)
     
     # Generate Q&A pairs from the answer
     qa_pairs = []
@@ -111,53 +257,21 @@ def get_summary(req: QueryRequest):
 
 
 @app.get("/flashcards")
-def get_flashcards():
+def get_flashcards(pdf_id: Optional[str] = None, offset: int = 0, limit: int = FLASHCARD_PAGE_SIZE):
     """
-    Returns all flashcards from the last ingestion session.
+    Returns a page of the flashcards stored at ingestion, optionally for
+    one PDF only, with the total count for paging.
     """
-    # gather flashcards from orchestrator trace if available
-    last_flashcards = []
-    for entry in orchestrator.trace:
-        if entry["agent"] == "FlashcardAgent" and entry.get("payload"):
-            payload = entry["payload"]
-            if "flashcards" in payload:
-                last_flashcards.extend(payload["flashcards"])
-    
-    # If no flashcards found, generate some from recent content
-    if not last_flashcards and orchestrator.trace:
-        # Get the last summary if available
-        for entry in reversed(orchestrator.trace):
-            if entry["agent"] == "SummarizerAgent" and entry.get("payload"):
-                payload = entry["payload"]
-                if "summary_pack" in payload:
-                    summary_pack = payload["summary_pack"]
-                    if summary_pack and "final_summary" in summary_pack:
-                        # Generate simple flashcards from the summary
-                        from app.agents.flashcards import simple_flashcards_from_text
-                        last_flashcards = simple_flashcards_from_text(summary_pack["final_summary"])
-                        break
-    
-    # If still no flashcards, generate some default ones
-    if not last_flashcards:
-        last_flashcards = [
-            {"question": "What is the main topic?", "answer": "The main topic covers the key concepts discussed in the document."},
-            {"question": "What are the key points?", "answer": "The key points include the most important information from the content."},
-            {"question": "How does this relate to the subject?", "answer": "This content provides insights into the broader subject matter."}
-        ]
-    
+    if offset < 0 or limit < 1:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit >= 1.")
+    page = orchestrator.get_flashcards(pdf_id, offset=offset, limit=min(limit, FLASHCARD_PAGE_MAX))
+
     # Convert to the format expected by frontend
-    formatted_flashcards = []
-    for card in last_flashcards:
-        if isinstance(card, dict):
-            formatted_flashcards.append({
-                "q": card.get("question", card.get("q", "Question")),
-                "a": card.get("answer", card.get("a", "Answer"))
-            })
-        else:
-            # Handle unexpected format
-            formatted_flashcards.append({"q": "Question", "a": str(card)})
-    
-    return {"flashcards": formatted_flashcards}
+    page["flashcards"] = [
+        {"q": card["question"], "a": card["answer"], "pdf_id": card["pdf_id"]}
+        for card in page["flashcards"]
+    ]
+    return page
 
 
 # ===============================
@@ -0,0 +1,71 @@
+import argparse
+import random
+import time
+from typing import List, Optional
+from app.agents.config import TOP_K_RETRIEVAL
+from app.crew_orchestrator import CrewOrchestrator
+from scripts.benchmark_summarizer import rouge
+
+ANSWER_MODES = ("extractive", "summaries", "abstractive")
+
+
+def sample_queries(orchestrator: CrewOrchestrator, num_queries: int, seed: int = 0) -> List[str]:
+    """Pseudo-queries: the opening words of randomly chosen indexed chunks."""
+    texts = [meta["text"] for _, meta in orchestrator.faiss_agent.idx.chunks() if meta.get("text", "").strip()]
+    random.Random(seed).shuffle(texts)
+    return [" ".join(t.split()[:12]) for t in texts[:num_queries]]
+
+
+def main(
+    queries: Optional[List[str]] = None,
+    num_queries: int = 20,
+    top_k: int = TOP_K_RETRIEVAL,
+    modes=ANSWER_MODES
+):
+    """
+    Latency and answer comparison of the QA answer modes over the same
+    retrieved hits. Answer caches are disabled so every query is computed.
+    Agreement is ROUGE-1/ROUGE-L F1 of each mode's answer against the
+    abstractive answer.
+    """
+    orchestrator = CrewOrchestrator(use_crew_sdk=False)
+    qa = orchestrator.qa_agent
+    qa.cache = None
+    qa.semantic_cache = None
+    if not queries:
+        queries = sample_queries(orchestrator, num_queries)
+    if not queries:
+        print("Index is empty; ingest PDFs first.")
+        return
+    print(f"Benchmarking {len(queries)} queries, top_k={top_k}")
+
+    # Warm-up so model loading is not billed to the first mode
+    qa.run(queries[0], top_k=top_k, answer_mode="extractive")
+
+    answers, timings = {}, {}
+    for mode in modes:
+        start = time.perf_counter()
+        answers[mode] = [qa.run(q, top_k=top_k, answer_mode=mode).payload["answer"] for q in queries]
+        timings[mode] = (time.perf_counter() - start) * 1000 / len(queries)
+
+    reference = answers.get("abstractive")
+    print(f"\n{'mode':<12} {'ms/query':>9} {'words':>7} {'R-1 vs abs':>11} {'R-L vs abs':>11}")
+    for mode in modes:
+        words = sum(len(a.split()) for a in answers[mode]) / len(queries)
+        if reference is not None and mode != "abstractive":
+            scores = [rouge(a, r) for a, r in zip(answers[mode], reference)]
+            r1 = f"{sum(s['rouge1'] for s in scores) / len(scores):.3f}"
+            rl = f"{sum(s['rougeL'] for s in scores) / len(scores):.3f}"
+        else:
+            r1 = rl = "-"
+        print(f"{mode:<12} {timings[mode]:>9.1f} {words:>7.1f} {r1:>11} {rl:>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare extractive, stored-summary and abstractive QA answers")
+    parser.add_argument("queries", nargs="*", help="queries to run (default: sampled from indexed chunks)")
+    parser.add_argument("--num-queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=TOP_K_RETRIEVAL)
+    parser.add_argument("--modes", nargs="+", choices=ANSWER_MODES, default=list(ANSWER_MODES))
+    args = parser.parse_args()
+    main(args.queries, args.num_queries, args.top_k, tuple(args.modes))
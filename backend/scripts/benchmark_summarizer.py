@@ -0,0 +1,102 @@
+import argparse
+import random
+import time
+from typing import List
+from app.agents.config import CHUNK_STORE_PATH, SUMMARIZER_BATCH_SIZE, SUMMARIZER_FAST_NUM_BEAMS
+from app.agents.chunk_store import ChunkStore
+from app.agents.summarizer import (
+    load_summarizer, generation_kwargs, extractive_filter_many, input_token_budget
+)
+
+
+def _lcs(a: List[str], b: List[str]) -> int:
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def _f1(overlap: int, n_pred: int, n_ref: int) -> float:
+    if not overlap:
+        return 0.0
+    p, r = overlap / n_pred, overlap / n_ref
+    return 2 * p * r / (p + r)
+
+
+def rouge(pred: str, ref: str) -> dict:
+    """ROUGE-1 and ROUGE-L F1 between two summaries (lowercased whitespace tokens)."""
+    p, r = pred.lower().split(), ref.lower().split()
+    if not p or not r:
+        return {"rouge1": 0.0, "rougeL": 0.0}
+    unigram = sum(min(p.count(w), r.count(w)) for w in set(p))
+    return {"rouge1": _f1(unigram, len(p), len(r)), "rougeL": _f1(_lcs(p, r), len(p), len(r))}
+
+
+def run(pipe, texts: List[str], fast: bool, max_length: int, min_length: int, batch_size: int):
+    """Summaries and wall time of one configuration over the texts (length-sorted batches)."""
+    tokenizer = pipe.tokenizer
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    out = [""] * len(texts)
+    start = time.perf_counter()
+    for b in range(0, len(order), batch_size):
+        idx = order[b:b + batch_size]
+        inputs = [texts[i] for i in idx]
+        longest = min(max(len(tokenizer.encode(t)) for t in inputs), input_token_budget())
+        res = pipe(inputs, batch_size=len(inputs), truncation=True,
+                   **generation_kwargs(max_length, min_length, longest, fast=fast))
+        for i, item in zip(idx, res):
+            item = item[0] if isinstance(item, list) else item
+            out[i] = item["summary_text"].strip()
+    return out, time.perf_counter() - start
+
+
+def main(
+    num_chunks: int = 64,
+    batch_size: int = SUMMARIZER_BATCH_SIZE,
+    max_length: int = 120,
+    min_length: int = 40,
+    seed: int = 0
+):
+    """
+    Compare the default fp32 summarization pipeline with fast mode (int8
+    dynamic quantization, greedy/small-beam decoding, input-sized
+    max_new_tokens) on a sample of indexed chunks: latency per chunk and
+    ROUGE agreement of the fast summaries with the default ones.
+    """
+    store = ChunkStore(CHUNK_STORE_PATH)
+    texts = [meta["text"] for meta in store if meta.get("text", "").strip()]
+    store.close()
+    if not texts:
+        print(f"No chunks in {CHUNK_STORE_PATH}; ingest a PDF first.")
+        return
+    random.Random(seed).shuffle(texts)
+    texts = extractive_filter_many(texts[:num_chunks], top_k=6)
+    print(f"Benchmarking on {len(texts)} chunks (batch size {batch_size})")
+
+    baseline, base_s = run(load_summarizer(fast=False), texts, False, max_length, min_length, batch_size)
+    fast, fast_s = run(load_summarizer(fast=True), texts, True, max_length, min_length, batch_size)
+
+    scores = [rouge(f, b) for f, b in zip(fast, baseline)]
+    rouge1 = sum(s["rouge1"] for s in scores) / len(scores)
+    rouge_l = sum(s["rougeL"] for s in scores) / len(scores)
+    avg_words = lambda summaries: sum(len(s.split()) for s in summaries) / len(summaries)
+
+    print(f"\n{'mode':<28} {'ms/chunk':>9} {'words':>7}")
+    print(f"{'default (fp32)':<28} {base_s * 1000 / len(texts):>9.1f} {avg_words(baseline):>7.1f}")
+    print(f"{f'fast (int8, beams={SUMMARIZER_FAST_NUM_BEAMS})':<28} {fast_s * 1000 / len(texts):>9.1f} {avg_words(fast):>7.1f}")
+    print(f"\nSpeed-up: {base_s / fast_s:.2f}x")
+    print(f"Fast vs default agreement: ROUGE-1 F1 {rouge1:.3f}, ROUGE-L F1 {rouge_l:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quality/latency comparison of the summarizer's fast CPU mode")
+    parser.add_argument("--num-chunks", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=SUMMARIZER_BATCH_SIZE)
+    parser.add_argument("--max-length", type=int, default=120)
+    parser.add_argument("--min-length", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.num_chunks, args.batch_size, args.max_length, args.min_length, args.seed)
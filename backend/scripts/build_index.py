@@ -1,24 +1,38 @@
-import sys
 from pathlib import Path
+from typing import Any, Dict, Optional
 from app.crew_orchestrator import CrewOrchestrator
-from app.agents.config import DATA_DIR, FAISS_INDEX_PATH, METADATA_DB
+from app.agents.config import DATA_DIR, FAISS_INDEX_PATH, CHUNK_STORE_PATH, KEYWORD_INDEX_PATH
 from app.utils.helpers import list_pdf_files, ensure_dir
 
-def main(data_dir: Path = DATA_DIR):
+def main(data_dir: Path = DATA_DIR, orchestrator: Optional[CrewOrchestrator] = None) -> Dict[str, Any]:
     """
     Batch ingest PDFs from data directory, generate chunks, embeddings,
     optionally summaries & flashcards, and save FAISS index & metadata.
+
+    Args:
+        data_dir: Directory holding the PDFs
+        orchestrator: Orchestrator to ingest through. The server passes its
+            live one, so the index it serves is the one rebuilt (a second
+            instance would write the same files behind its back), and
+            gets back without waiting for the summary/flashcard jobs. None
+            creates one and waits for them, as when run from the command line.
+
+    Returns:
+        Dict with num_pdfs ingested and the job_ids queued for them
     """
     ensure_dir(data_dir)
     pdf_files = list_pdf_files(data_dir)
 
     if not pdf_files:
         print(f"No PDF files found in {data_dir}. Exiting.")
-        sys.exit(0)
+        return {"num_pdfs": 0, "job_ids": []}
 
     print(f"Found {len(pdf_files)} PDFs. Building index...")
 
-    orchestrator = CrewOrchestrator(use_crew_sdk=False)
+    wait_for_jobs = orchestrator is None
+    if orchestrator is None:
+        orchestrator = CrewOrchestrator(use_crew_sdk=False)
+    job_ids = []
 
     for pdf_path in pdf_files:
         print(f"\nProcessing {pdf_path.name}...")
@@ -28,14 +42,32 @@ def main(data_dir: Path = DATA_DIR):
             pre_summarize=True,
             generate_flashcards=True
         )
-        print(f"Chunks: {result['num_chunks']}, "
-              f"Flashcards: {len(result['flashcards'])}")
+        if "job_id" in result:
+            job_ids.append(result["job_id"])
+            print(f"Chunks: {result['num_chunks']}, summary/flashcards queued as job {result['job_id']}")
+        else:
+            print(f"Chunks: {result['num_chunks']}, "
+                  f"Flashcards: {len(result['flashcards'])}")
 
-    # Save FAISS index and metadata
-    orchestrator.faiss_agent.idx.save(index_path=FAISS_INDEX_PATH, meta_path=METADATA_DB)
+    # Snapshot FAISS index (chunk metadata is written incrementally during ingest)
+    orchestrator.faiss_agent.idx.save()
     print(f"\nFAISS index saved to {FAISS_INDEX_PATH}")
-    print(f"Metadata saved to {METADATA_DB}")
+    print(f"Metadata stored in {CHUNK_STORE_PATH}")
+    print(f"Keyword index stored in {KEYWORD_INDEX_PATH}")
+
+    # All documents are searchable now; from the command line, wait for
+    # summaries and flashcards (the server leaves them to /jobs/{job_id})
+    if job_ids and wait_for_jobs:
+        print(f"Waiting for {len(job_ids)} summarization jobs...")
+        orchestrator.jobs.wait()
+        for job_id in job_ids:
+            status = orchestrator.job_status(job_id)
+            if status["status"] == "done":
+                print(f"{status['pdf_id']}: Flashcards: {status['num_flashcards']}")
+            else:
+                print(f"{status['pdf_id']}: job {status['status']} ({status['error']})")
     print("Index building complete!")
+    return {"num_pdfs": len(pdf_files), "job_ids": job_ids}
 
 
 if __name__ == "__main__":
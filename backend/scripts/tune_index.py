@@ -0,0 +1,62 @@
+import argparse
+from app.agents.config import (
+    TOP_K_RETRIEVAL, TUNE_TARGET_RECALL, TUNE_MEMORY_BUDGET_MB, TUNE_NUM_QUERIES,
+    FAISS_NUM_SHARDS
+)
+from app.agents.faiss_index import FaissIndex
+from app.agents.sharded_index import ShardedFaissIndex
+from app.agents.hnsw_tuning import sweep_hnsw, pick_hnsw_config
+from app.agents.embeddings import EmbeddingService
+
+
+def main(
+    k: int = TOP_K_RETRIEVAL,
+    target_recall: float = TUNE_TARGET_RECALL,
+    memory_budget_mb: float = TUNE_MEMORY_BUDGET_MB,
+    num_queries: int = TUNE_NUM_QUERIES,
+    dry_run: bool = False
+):
+    """
+    Tune HNSW parameters for each index shard against a recall@k target and
+    memory budget, then persist and apply the chosen configuration.
+    """
+    dim = EmbeddingService().model.get_sentence_embedding_dimension()
+    if FAISS_NUM_SHARDS > 1:
+        shards = ShardedFaissIndex.load(dim=dim, num_shards=FAISS_NUM_SHARDS).shards
+    else:
+        shards = [FaissIndex.load(dim=dim)]
+
+    for i, idx in enumerate(shards):
+        _, vectors = idx.live_vectors()
+        if len(vectors) < 20:
+            print(f"Shard {i}: only {len(vectors)} vectors, keeping {idx.hnsw_params}")
+            continue
+
+        results = sweep_hnsw(vectors, k=k, num_queries=num_queries)
+        print(f"\nShard {i}: {len(vectors)} vectors")
+        print(f"{'M':>4} {'efC':>5} {'efS':>5} {'recall':>7} {'MB':>8} {'ms/q':>7}")
+        for r in results:
+            print(f"{r['M']:>4} {r['efConstruction']:>5} {r['efSearch']:>5} "
+                  f"{r['recall']:>7.3f} {r['memory_mb']:>8.2f} {r['latency_ms']:>7.3f}")
+
+        best = pick_hnsw_config(results, target_recall=target_recall, memory_budget_mb=memory_budget_mb)
+        if best is None:
+            print(f"No configuration reaches recall@{k} >= {target_recall} within budget; keeping {idx.hnsw_params}")
+            continue
+        params = {key: best[key] for key in ("M", "efConstruction", "efSearch")}
+        print(f"Selected {params} (recall@{k}={best['recall']:.3f}, {best['memory_mb']:.2f} MB)")
+        if not dry_run:
+            idx.set_hnsw_params(params)
+            idx.save()
+    print("Tuning complete!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune HNSW parameters of the FAISS index")
+    parser.add_argument("--k", type=int, default=TOP_K_RETRIEVAL)
+    parser.add_argument("--target-recall", type=float, default=TUNE_TARGET_RECALL)
+    parser.add_argument("--memory-budget-mb", type=float, default=TUNE_MEMORY_BUDGET_MB)
+    parser.add_argument("--num-queries", type=int, default=TUNE_NUM_QUERIES)
+    parser.add_argument("--dry-run", action="store_true", help="report the sweep without applying it")
+    args = parser.parse_args()
+    main(args.k, args.target_recall, args.memory_budget_mb, args.num_queries, args.dry_run)
@@ -5,6 +5,7 @@ Check if FAISS index exists and has data.
 
 import sys
 import os
+import itertools
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 def check_faiss_index():
@@ -12,45 +13,62 @@ def check_faiss_index():
     print("=== Checking FAISS Index Status ===")
     
     try:
-        from backend.app.agents.config import FAISS_INDEX_PATH, METADATA_DB
+        from backend.app.agents.config import (
+            FAISS_INDEX_PATH, CHUNK_STORE_PATH, METADATA_DB, FAISS_WAL_PATH, FAISS_VECTORS_PATH
+        )
+        from backend.app.agents.chunk_store import ChunkStore
         from backend.app.agents.faiss_index import FaissIndex
-        import json
         
         print(f"FAISS index path: {FAISS_INDEX_PATH}")
-        print(f"Metadata path: {METADATA_DB}")
+        print(f"Chunk store path: {CHUNK_STORE_PATH}")
         
         # Check if files exist
         index_exists = FAISS_INDEX_PATH.exists()
-        metadata_exists = METADATA_DB.exists()
+        store_exists = CHUNK_STORE_PATH.exists()
         
         print(f"Index file exists: {index_exists}")
-        print(f"Metadata file exists: {metadata_exists}")
+        print(f"Chunk store exists: {store_exists}")
         
-        if not index_exists or not metadata_exists:
-            print("❌ FAISS index or metadata file missing")
+        if not store_exists:
+            if METADATA_DB.exists():
+                print(f"Legacy metadata found at {METADATA_DB}; it is migrated when the backend starts")
+            print("❌ Chunk store missing")
             print("Solution: Run the build_index script to create the index")
             return False
         
-        # Check metadata content
-        with open(METADATA_DB, 'r') as f:
-            metadata = json.load(f)
+        # Check chunk store content
+        store = ChunkStore(CHUNK_STORE_PATH)
+        try:
+            live, deleted, documents = len(store), store.num_deleted(), store.num_documents()
+        finally:
+            store.close()
         
-        print(f"Metadata entries: {len(metadata)}")
+        print(f"Chunks: {live} live, {deleted} deleted, {documents} documents")
         
-        if len(metadata) == 0:
+        if live == 0:
             print("❌ FAISS index is empty")
             print("Solution: Run the build_index script to populate the index")
             return False
         
-        # Try to load the index
+        # Try to load the index read-only (memory-mapped), so the check never
+        # replays, migrates or backfills anything on disk
         try:
-            index = FaissIndex.load(dim=384)  # all-MiniLM-L6-v2 dimension
-            print(f"✅ FAISS index loaded successfully with {len(index.metadb)} entries")
+            index = FaissIndex.load(
+                dim=384,  # all-MiniLM-L6-v2 dimension
+                index_path=FAISS_INDEX_PATH,
+                store_path=CHUNK_STORE_PATH,
+                legacy_meta_path=None,
+                wal_path=FAISS_WAL_PATH if FAISS_WAL_PATH.exists() else None,
+                vector_path=FAISS_VECTORS_PATH,
+                mmap=True
+            )
+            print(f"✅ FAISS index loaded successfully with {len(index)} entries "
+                  f"({index.index.ntotal} vectors in the snapshot)")
             
             # Show sample entries
             if len(index.metadb) > 0:
                 print("Sample entries:")
-                for i, entry in enumerate(index.metadb[:3]):
+                for i, (_, entry) in enumerate(itertools.islice(index.metadb.items(), 3)):
                     print(f"  {i+1}. {entry.get('text', 'No text')[:100]}...")
             
             return True
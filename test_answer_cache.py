@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the semantic query cache.
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+def test_semantic_cache_versions():
+    """Test similarity hits and index version handling"""
+    print("=== Testing SemanticQueryCache ===")
+
+    try:
+        import numpy as np
+        from backend.app.agents.answer_cache import SemanticQueryCache
+
+        cache = SemanticQueryCache(dim=4, threshold=0.9)
+        q = np.array([1, 0, 0, 0], dtype='float32')
+        paraphrase = np.array([0.99, 0.1, 0, 0], dtype='float32')
+        paraphrase /= np.linalg.norm(paraphrase)
+        other = np.array([0, 1, 0, 0], dtype='float32')
+        scope = (5, None, "extractive")
+
+        assert cache.get(q, scope, 1) is None
+        cache.put(q, scope, 1, {"answer": "a1", "sources": []})
+        assert cache.get(paraphrase, scope, 1)["answer"] == "a1"
+        assert cache.get(other, scope, 1) is None
+        assert cache.get(paraphrase, (3, None, "extractive"), 1) is None
+        print("✅ Paraphrased queries with the same scope hit")
+
+        # An answer retrieved under a stale version is dropped and does not
+        # reset the cache
+        cache.put(other, scope, 0, {"answer": "stale", "sources": []})
+        assert len(cache) == 1
+        assert cache.get(other, scope, 1) is None
+        assert cache.get(q, scope, 0) is None
+        assert cache.get(q, scope, 1)["answer"] == "a1"
+        # Nor does an answer from a version no lookup has reached yet
+        cache.put(other, scope, 2, {"answer": "early", "sources": []})
+        assert cache.get(q, scope, 1)["answer"] == "a1"
+        print("✅ Answers from other versions are not cached")
+
+        # A lookup under a newer version drops the old entries
+        assert cache.get(q, scope, 2) is None
+        assert len(cache) == 0
+        cache.put(q, scope, 2, {"answer": "a2", "sources": []})
+        assert cache.get(q, scope, 2)["answer"] == "a2"
+        print("✅ Newer index version invalidates cached answers")
+
+    except Exception as e:
+        print(f"❌ Semantic cache test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_semantic_cache_versions()
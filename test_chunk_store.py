@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite chunk store: live counts and tombstones.
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+def test_chunk_store():
+    """Test live counts and tombstones of the chunk store, across two connections"""
+    print("=== Testing ChunkStore ===")
+
+    try:
+        from backend.app.agents.chunk_store import ChunkStore
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "chunks.db"
+            store = ChunkStore(path)
+            store.append([0, 1, 2], [
+                {"text": "alpha", "pdf_id": "a", "page": 1},
+                {"text": "beta", "pdf_id": "a", "page": 2},
+                {"text": "gamma", "pdf_id": "b", "page": 1, "summary": "g"},
+            ])
+            assert len(store) == 3
+            assert store.next_id() == 3
+            assert store[2]["summary"] == "g"
+            assert [vid for vid, _ in store.items()] == [0, 1, 2]
+
+            version = store.tombstone_version()
+            assert store.tombstone_pdf("a") == 2
+            assert store.tombstone_version() != version
+            assert len(store) == 1
+            assert sorted(store.deleted_ids()) == [0, 1]
+            assert store.live_ids([0, 1, 2]) == [2]
+            print("✅ Tombstoned rows are excluded from the live count")
+
+            # A second connection tombstones a row; the first must notice
+            other = ChunkStore(path)
+            other.tombstone([2])
+            other.close()
+            assert len(store) == 0
+            print("✅ Live count follows writes of another connection")
+
+            store.purge([0, 1, 2])
+            assert store.num_deleted() == 0
+            store.close()
+
+    except Exception as e:
+        print(f"❌ ChunkStore test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_chunk_store()
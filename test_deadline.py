@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test latency budgets: deadlines, stage estimates and answer tier degradation.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+TEXTS = [
+    "Photosynthesis is the process by which green plants use sunlight to make glucose from carbon dioxide and water.",
+    "Chlorophyll in the chloroplasts absorbs light energy, which drives the light-dependent reactions of photosynthesis.",
+    "The Calvin cycle uses ATP and NADPH from the light reactions to fix carbon dioxide into sugars.",
+    "Cellular respiration breaks glucose down in the mitochondria and releases energy as ATP.",
+]
+QUERY = "How do plants turn sunlight into sugar?"
+
+def _qa_agent():
+    from backend.app.agents.agents import FAISSAgent, QAAgent, SummarizerAgent
+    from backend.app.agents.embeddings import EmbeddingService
+
+    embedding = EmbeddingService()
+    vectors = embedding.embed(TEXTS)
+    faiss_agent = FAISSAgent(dim=vectors.shape[1])
+    faiss_agent.add(vectors, [{"text": t, "pdf_id": "bio", "page": i + 1} for i, t in enumerate(TEXTS)])
+    return QAAgent(embedding_service=embedding, faiss_agent=faiss_agent, summarizer_agent=SummarizerAgent())
+
+def test_deadline():
+    """Test deadline bookkeeping and stage estimates"""
+    print("=== Testing Deadline and StageEstimates ===")
+
+    try:
+        from backend.app.agents.deadline import Deadline, StageEstimates
+
+        unlimited = Deadline(None)
+        assert unlimited.unlimited
+        assert unlimited.remaining_s() is None
+        assert unlimited.allows(1e9)
+
+        deadline = Deadline(50)
+        assert not deadline.unlimited
+        assert deadline.allows(10)
+        assert not deadline.allows(1000)
+        time.sleep(0.06)
+        assert deadline.remaining_ms() == 0
+        assert not deadline.allows(1)
+        print("✅ Deadline expires after its budget")
+
+        estimates = StageEstimates({"embed": 100}, alpha=0.5)
+        estimates.observe("embed", 200)
+        estimates.observe("retrieve", 40)
+        assert estimates["embed"] == 150
+        assert estimates["retrieve"] == 40
+        assert estimates["unknown"] == 0
+        print("✅ Stage estimates follow observed timings")
+
+    except Exception as e:
+        print(f"❌ Deadline test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+def test_answer_tiers():
+    """Test that answers degrade to cheaper tiers when the budget is short"""
+    print("\n=== Testing answer tiers ===")
+
+    try:
+        from backend.app.agents.deadline import Deadline, StageEstimates
+
+        qa = _qa_agent()
+        ladder = qa._tier_ladder("abstractive")
+        assert ladder[0] == "abstractive" and ladder[-1] == "truncation"
+        assert qa._tier_ladder("extractive")[:1] == ["extractive"]
+        assert "abstractive" not in qa._tier_ladder("extractive")
+
+        hits = qa.faiss_agent.keyword_search("photosynthesis", top_k=3).payload["hits"]
+        answer, evidence, tier, _ = qa._answer_within(QUERY, None, hits, "abstractive", Deadline(0))
+        assert tier == "truncation" and answer and evidence is None
+        answer, evidence, tier, qvec = qa._answer_within(QUERY, None, hits, "extractive", Deadline(None))
+        assert tier == "extractive" and evidence and qvec is not None
+        print("✅ Tier chosen to fit the budget")
+
+        # A generation tier that overruns the budget is stopped and degraded
+        stops = []
+        def slow_answer(hits, stop):
+            stops.append(stop)
+            stop.wait(5)
+            return "too late"
+        qa._abstractive_answer = slow_answer
+        qa.stage_ms = StageEstimates({"abstractive": 10})
+        start = time.perf_counter()
+        answer, _, tier, _ = qa._answer_within(QUERY, None, hits, "abstractive", Deadline(200))
+        assert tier != "abstractive" and answer != "too late"
+        assert stops and stops[0].is_set()
+        assert time.perf_counter() - start < 2
+        print("✅ Overrunning generation stopped at the deadline")
+
+        # A degraded answer is reported as such and not cached
+        res = qa.run(QUERY, answer_mode="extractive", budget_ms=0)
+        assert res.payload["degraded"] and res.payload["tier"] != "extractive"
+        res = qa.run(QUERY, answer_mode="extractive", budget_ms=None)
+        assert not res.payload["degraded"] and res.payload["tier"] == "extractive"
+        assert "served answer from cache" not in res.logs
+        print("✅ Degraded answers are not cached")
+
+    except Exception as e:
+        print(f"❌ Answer tier test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_deadline()
+    test_answer_tiers()
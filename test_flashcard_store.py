@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite flashcard store.
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+def test_flashcard_store():
+    """Test per-document replacement and paging of flashcards"""
+    print("=== Testing FlashcardStore ===")
+
+    try:
+        from backend.app.agents.flashcard_store import FlashcardStore
+
+        store = FlashcardStore()
+        cards = [{"question": f"Q{i}", "answer": f"A{i}", "source": "s"} for i in range(5)]
+        assert store.replace("doc", cards + [{"question": "no answer"}]) == 5
+        assert store.replace("other", cards[:2]) == 2
+        assert store.count("doc") == 5
+        assert len(store) == 7
+
+        page = store.page("doc", offset=1, limit=2)
+        assert [c["question"] for c in page] == ["Q1", "Q2"]
+        assert all(c["pdf_id"] == "doc" for c in page)
+        print("✅ Cards are paged in generation order")
+
+        store.replace("doc", cards[:1])
+        assert store.count("doc") == 1
+        assert store.remove_pdf("other") == 2
+        assert len(store) == 1
+        print("✅ Re-ingested documents replace their cards")
+        store.close()
+
+    except Exception as e:
+        print(f"❌ FlashcardStore test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_flashcard_store()
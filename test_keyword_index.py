@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the BM25 keyword index.
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+def test_keyword_index():
+    """Test BM25 search, document filtering and removal"""
+    print("=== Testing KeywordIndex ===")
+
+    try:
+        from backend.app.agents.keyword_index import KeywordIndex, reciprocal_rank_fusion
+
+        index = KeywordIndex()
+        index.add([10, 11, 12], [
+            {"text": "Photosynthesis converts sunlight into chemical energy.", "pdf_id": "bio"},
+            {"text": "Mitochondria release energy by respiration.", "pdf_id": "bio"},
+            {"text": "Newton's laws describe motion and energy.", "pdf_id": "phys"},
+        ])
+        assert len(index) == 3
+        assert [vid for vid, _ in index.search("photosynthesis")] == [10]
+        assert {vid for vid, _ in index.search("energy", top_k=5, pdf_id="bio")} == {10, 11}
+        print("✅ Keyword search ranks and filters by document")
+
+        assert index.remove_pdf("bio") == 2
+        assert index.search("photosynthesis") == []
+        assert [vid for vid, _ in index.search("energy")] == [12]
+        print("✅ Removed documents are no longer found")
+
+        assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]], top_k=2) == [1, 3]
+        index.close()
+
+    except Exception as e:
+        print(f"❌ KeywordIndex test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_keyword_index()
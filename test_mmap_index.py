@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test memory-mapped, read-only index loading.
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+DIM = 16
+
+def _vectors(n, seed):
+    vecs = np.random.default_rng(seed).standard_normal((n, DIM)).astype('float32')
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+def _open(tmp, mmap=False):
+    from backend.app.agents.faiss_index import FaissIndex
+    return FaissIndex.load(
+        dim=DIM,
+        index_path=Path(tmp) / "index.faiss",
+        store_path=Path(tmp) / "chunks.db",
+        legacy_meta_path=None,
+        wal_path=Path(tmp) / "index.wal",
+        vector_path=Path(tmp) / "vectors.npy",
+        mmap=mmap
+    )
+
+def _digests(tmp):
+    # SQLite's own -wal/-shm files change on any open; compare the data files
+    return {p.name: hashlib.sha256(p.read_bytes()).hexdigest()
+            for p in Path(tmp).iterdir() if not p.name.endswith(("-wal", "-shm"))}
+
+def test_mmap_load():
+    """Test that a read-only index serves the snapshot and WAL tail and refuses writes"""
+    print("=== Testing mmap index loading ===")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = _open(tmp)
+            saved = _vectors(10, seed=1)
+            saved_ids = writer.add(saved, [{"text": f"saved {i}", "pdf_id": "a"} for i in range(10)])
+            writer.save()
+            tail = _vectors(3, seed=2)
+            tail_ids = writer.add(tail, [{"text": f"tail {i}", "pdf_id": "b"} for i in range(3)])
+            before = _digests(tmp)
+
+            reader = _open(tmp, mmap=True)
+            assert reader.read_only
+            assert len(reader) == 13
+            assert reader.search(saved[0], top_k=1)[0]["id"] == saved_ids[0]
+            assert reader.search(tail[0], top_k=1)[0]["id"] == tail_ids[0]
+            assert reader.search(tail[1], top_k=1, pdf_id="b")[0]["id"] == tail_ids[1]
+            print("✅ Read-only index serves the snapshot and the WAL tail")
+
+            try:
+                reader.add(tail, [{"text": "x"}] * 3)
+                raise AssertionError("read-only index accepted an add")
+            except RuntimeError:
+                pass
+            assert _digests(tmp) == before
+            print("✅ Read-only index refuses writes and leaves the files untouched")
+
+            reader.metadb.close()
+            reader.wal.close()
+            if reader.vectors is not None:
+                reader.vectors.close()
+            writer.metadb.close()
+            writer.wal.close()
+            writer.vectors.close()
+
+    except Exception as e:
+        print(f"❌ mmap loading test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_mmap_load()
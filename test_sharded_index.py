@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the sharded FAISS index: routing, scatter-gather search and removal.
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+DIM = 16
+
+def _vectors(n, seed):
+    vecs = np.random.default_rng(seed).standard_normal((n, DIM)).astype('float32')
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+def test_sharded_index():
+    """Test that documents stay on one shard and search merges all shards"""
+    print("=== Testing ShardedFaissIndex ===")
+
+    try:
+        from backend.app.agents.sharded_index import ShardedFaissIndex
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index = ShardedFaissIndex.load(
+                dim=DIM, num_shards=3,
+                index_path=Path(tmp) / "index.faiss",
+                store_path=Path(tmp) / "chunks.db",
+                wal_path=Path(tmp) / "index.wal",
+                vector_path=Path(tmp) / "vectors.npy",
+                partition="hash"
+            )
+            vectors = {f"doc{d}": _vectors(8, seed=d) for d in range(6)}
+            ids = {}
+            for pdf_id, vecs in vectors.items():
+                ids[pdf_id] = index.add(vecs, [{"text": f"{pdf_id} {i}", "pdf_id": pdf_id} for i in range(8)])
+            assert len(index) == 48
+            for pdf_id, vids in ids.items():
+                assert len({index._shard_of_id(v) for v in vids}) == 1
+            assert sum(1 for shard in index.shards if len(shard)) > 1
+            print("✅ Each document is routed to a single shard")
+
+            for pdf_id, vecs in vectors.items():
+                assert index.search(vecs[3], top_k=1)[0]["id"] == ids[pdf_id][3]
+            hits = index.search(vectors["doc2"][0], top_k=4, pdf_id=["doc2", "doc5"])
+            assert {h["pdf_id"] for h in hits} <= {"doc2", "doc5"}
+            print("✅ Scatter-gather search finds vectors on every shard")
+
+            assert index.remove("doc2") == 8
+            assert len(index) == 40
+            assert all(h["pdf_id"] != "doc2" for h in index.search(vectors["doc2"][0], top_k=10))
+            assert index.search(vectors["doc2"][0], top_k=5, pdf_id="doc2") == []
+            print("✅ Removed documents disappear from every shard")
+
+            for shard in index.shards:
+                if shard._compaction is not None:
+                    shard._compaction.join()
+                shard.metadb.close()
+                shard.wal.close()
+                shard.vectors.close()
+
+    except Exception as e:
+        print(f"❌ Sharded index test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_sharded_index()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test streamed answers (the events behind /query/stream).
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+TEXTS = [
+    "Photosynthesis is the process by which green plants use sunlight to make glucose from carbon dioxide and water.",
+    "Chlorophyll in the chloroplasts absorbs light energy, which drives the light-dependent reactions of photosynthesis.",
+    "The Calvin cycle uses ATP and NADPH from the light reactions to fix carbon dioxide into sugars.",
+    "Cellular respiration breaks glucose down in the mitochondria and releases energy as ATP.",
+]
+QUERY = "How do plants turn sunlight into sugar?"
+
+def _qa_agent():
+    from backend.app.agents.agents import FAISSAgent, QAAgent, SummarizerAgent
+    from backend.app.agents.embeddings import EmbeddingService
+
+    embedding = EmbeddingService()
+    vectors = embedding.embed(TEXTS)
+    faiss_agent = FAISSAgent(dim=vectors.shape[1])
+    faiss_agent.add(vectors, [{"text": t, "pdf_id": "bio", "page": i + 1} for i, t in enumerate(TEXTS)])
+    return QAAgent(embedding_service=embedding, faiss_agent=faiss_agent, summarizer_agent=SummarizerAgent())
+
+def test_streamed_answer():
+    """Test that a streamed answer that completes is reported not degraded"""
+    print("=== Testing streamed answer ===")
+
+    try:
+        qa = _qa_agent()
+        events = list(qa.stream(QUERY, answer_mode="abstractive", budget_ms=None))
+        kinds = [kind for kind, _ in events]
+        assert kinds[0] == "sources" and kinds[-1] == "done"
+        assert events[0][1]["sources"]
+
+        done = events[-1][1]
+        tokens = "".join(data["text"] for kind, data in events if kind == "token")
+        assert done["tier"] == "abstractive"
+        assert not done["degraded"]
+        assert done["answer"] == tokens.strip()
+        print(f"✅ Streamed {kinds.count('token')} pieces, not degraded")
+
+        # The completed answer was cached like a non-streamed one
+        res = qa.run(QUERY, answer_mode="abstractive", budget_ms=None)
+        assert "served answer from cache" in res.logs
+        assert res.payload["answer"] == done["answer"]
+        print("✅ Completed stream cached")
+
+    except Exception as e:
+        print(f"❌ Streamed answer test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_streamed_answer()
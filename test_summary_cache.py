@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the persistent summary cache and what the summarizer stores in it.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+def test_summary_cache():
+    """Test summary cache hits, persistence and LRU eviction"""
+    print("=== Testing SummaryCache ===")
+
+    try:
+        from backend.app.agents.summary_cache import SummaryCache, cache_key
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "summaries.db"
+            cache = SummaryCache(path, max_entries=2)
+            k1 = cache_key("chunk", "first text", max_length=120)
+            k2 = cache_key("chunk", "second text", max_length=120)
+            k3 = cache_key("chunk", "third text", max_length=120)
+            assert k1 != cache_key("chunk", "first text", max_length=60)
+
+            cache.put(k1, "one")
+            cache.put(k2, {"final_summary": "two"})
+            assert cache.get_many([k1, k2, k3]) == ["one", {"final_summary": "two"}, None]
+            assert (cache.hits, cache.misses) == (2, 1)
+
+            # Make k1 the least recently used, then overflow the cache
+            cache.get(k2)
+            cache._conn.execute("UPDATE summaries SET last_used = 0 WHERE key = ?", (k1,))
+            cache.put(k3, "three")
+            assert len(cache) == 2
+            assert cache.get(k1) is None
+            print("✅ Least recently used entry evicted")
+            cache.close()
+
+            reopened = SummaryCache(path, max_entries=2)
+            assert reopened.get(k3) == "three"
+            reopened.close()
+            print("✅ Cached summaries survive a restart")
+
+    except Exception as e:
+        print(f"❌ SummaryCache test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+def test_fallback_packs_not_cached():
+    """Test that a document pack built from fallback summaries is not cached"""
+    print("\n=== Testing summary packs with fallbacks ===")
+
+    try:
+        from backend.app.agents import summarizer
+        from backend.app.agents.summary_cache import SummaryCache
+
+        chunks = [
+            {"text": "Photosynthesis converts light energy into chemical energy stored in glucose. " * 4, "page": 1},
+            {"text": "The Calvin cycle fixes carbon dioxide using ATP and NADPH from the light reactions. " * 4, "page": 2},
+        ]
+        original = summarizer.summary_cache
+        summarizer.summary_cache = SummaryCache()
+        try:
+            # A stop event set up front makes every summary an extractive fallback
+            stop = threading.Event()
+            stop.set()
+            pack = summarizer.chunk_and_summarize_chunks(chunks, stop=stop)
+            assert pack["final_summary"]
+            assert len(summarizer.summary_cache) == 0
+            print("✅ Pack with fallback summaries not cached")
+
+            pack = summarizer.chunk_and_summarize_chunks(chunks)
+            cached = len(summarizer.summary_cache)
+            assert cached > 0
+            assert summarizer.chunk_and_summarize_chunks(chunks) == pack
+            assert len(summarizer.summary_cache) == cached
+            print("✅ Generated pack cached and reused")
+        finally:
+            summarizer.summary_cache.close()
+            summarizer.summary_cache = original
+
+    except Exception as e:
+        print(f"❌ Fallback pack test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_summary_cache()
+    test_fallback_packs_not_cached()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test stable vector ids: a tombstoned id is never returned, upserts replace
+a document, and compaction drops tombstoned vectors.
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+DIM = 16
+
+def _vectors(n, seed):
+    vecs = np.random.default_rng(seed).standard_normal((n, DIM)).astype('float32')
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+def _metas(pdf_id, n):
+    return [{"text": f"{pdf_id} chunk {i}", "pdf_id": pdf_id, "page": i + 1} for i in range(n)]
+
+def _open(tmp):
+    from backend.app.agents.faiss_index import FaissIndex
+    return FaissIndex.load(
+        dim=DIM,
+        index_path=Path(tmp) / "index.faiss",
+        store_path=Path(tmp) / "chunks.db",
+        legacy_meta_path=None,
+        wal_path=Path(tmp) / "index.wal",
+        vector_path=Path(tmp) / "vectors.npy"
+    )
+
+def _close(index):
+    # Release the files so the temporary directory can be removed on any OS
+    index.metadb.close()
+    index.wal.close()
+    index.vectors.close()
+
+def _wait_for_compaction(index):
+    if index._compaction is not None:
+        index._compaction.join()
+
+def test_tombstone_filtering():
+    """Test that a tombstoned id is never returned by search"""
+    print("=== Testing tombstone filtering ===")
+
+    try:
+        from backend.app.agents.faiss_index import FaissIndex
+
+        index = FaissIndex(DIM)
+        kept = _vectors(20, seed=1)
+        removed = _vectors(5, seed=2)
+        kept_ids = index.add(kept, _metas("kept", 20))
+        removed_ids = index.add(removed, _metas("removed", 5))
+
+        assert index.search(removed[0], top_k=1)[0]["id"] == removed_ids[0]
+        assert index.remove("removed") == 5
+        for q in removed:
+            hits = index.search(q, top_k=25)
+            assert not {h["id"] for h in hits} & set(removed_ids)
+            assert all(h["pdf_id"] == "kept" for h in hits)
+        assert index.search(removed[0], top_k=5, pdf_id="removed") == []
+        print("✅ Tombstoned ids are never returned")
+
+        # Re-ingesting replaces the old vectors of the document
+        _wait_for_compaction(index)
+        new_ids = index.upsert("kept", kept[:3], _metas("kept", 3))
+        hits = index.search(kept[0], top_k=25)
+        assert {h["id"] for h in hits} <= set(new_ids)
+        assert not {h["id"] for h in hits} & set(kept_ids)
+        print("✅ Upserted document only returns its new vectors")
+
+    except Exception as e:
+        print(f"❌ Tombstone test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+def test_compaction():
+    """Test that compaction drops tombstoned vectors and keeps live ones searchable"""
+    print("=== Testing compaction ===")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = _open(tmp)
+            live = _vectors(12, seed=5)
+            live_ids = index.add(live, _metas("live", 12))
+            index.add(_vectors(6, seed=6), _metas("gone", 6))
+            index.remove("gone")
+            _wait_for_compaction(index)
+            index.compact()
+
+            assert index.index.ntotal == 12
+            assert index.metadb.num_deleted() == 0
+            assert len(index) == 12
+            for vid, q in zip(live_ids, live):
+                assert index.search(q, top_k=1)[0]["id"] == vid
+            print("✅ Compaction purged tombstones")
+
+            # The compacted snapshot is what a restart loads
+            _close(index)
+            index = _open(tmp)
+            assert index.index.ntotal == 12
+            assert index.search(live[0], top_k=1)[0]["id"] == live_ids[0]
+            _close(index)
+            print("✅ Compacted index reloads")
+
+    except Exception as e:
+        print(f"❌ Compaction test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+def test_search_during_upserts():
+    """Test that searches run alongside upserts and never return replaced vectors"""
+    print("\n=== Testing searches during upserts ===")
+
+    try:
+        import threading
+        from backend.app.agents.faiss_index import FaissIndex
+
+        index = FaissIndex(DIM)
+        for d in range(4):
+            index.add(_vectors(30, seed=10 + d), _metas(f"doc{d}", 30))
+        errors, done = [], threading.Event()
+
+        def search():
+            queries = _vectors(8, seed=20)
+            while not done.is_set():
+                try:
+                    D, I = index.search_raw(queries, top_k=10)
+                    live = set(index.metadb.live_ids([int(i) for i in I.ravel() if i >= 0]))
+                    index.search_raw(queries[:1], top_k=5, pdf_id="doc1")
+                    if not live:
+                        errors.append("no live hits")
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=search) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for k in range(20):
+            index.upsert(f"doc{k % 4}", _vectors(30, seed=100 + k), _metas(f"doc{k % 4}", 30))
+        done.set()
+        for t in threads:
+            t.join()
+        _wait_for_compaction(index)
+
+        assert not errors, errors[:3]
+        assert len(index) == 120
+        for hit in index.search(_vectors(1, seed=119)[0], top_k=30):
+            assert hit["id"] in set(index.metadb.live_ids([hit["id"]]))
+        print("✅ Concurrent searches and upserts agree")
+
+    except Exception as e:
+        print(f"❌ Concurrent search test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+if __name__ == "__main__":
+    test_tombstone_filtering()
+    test_compaction()
+    test_search_during_upserts()